@@ -1,6 +1,8 @@
 import functions_framework
 import flask
 import logging # Import logging module
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Optional
 from .config import load_config, Config
 from .logger import setup_logger # Import setup_logger
 # from .logger import logger # REMOVE direct logger import
@@ -12,14 +14,31 @@ from . import notifier
 # Get logger instance for this module
 logger = logging.getLogger(__name__)
 
+# Upper bound on concurrent HTML fetches in run_check
+MAX_FETCH_WORKERS = 8
 
-def process_url(url: str, cfg: Config) -> bool:
+
+def _fetch_url(url: str, cfg: Config) -> str | None:
+    """Fetches url with the request settings from cfg."""
+    return fetcher.fetch_html(
+        url=url,
+        timeout=cfg.request_timeout,
+        retries=cfg.request_retries,
+        delay=cfg.request_retry_delay
+    )
+
+
+def process_url(url: str, cfg: Config, known_urls_session: Optional[storage.KnownUrlsSession] = None,
+                html_future: Optional[Future] = None) -> bool:
     """
     Processes a single URL based on its configuration: fetches, parses, detects changes, and notifies.
 
     Args:
         url (str): The URL to process.
         cfg (Config): The application configuration.
+        known_urls_session (Optional[storage.KnownUrlsSession]): Shared known-URLs state for this run.
+            If None, known URLs are loaded and saved for this URL alone.
+        html_future (Optional[Future]): Fetch of url already started by the caller. If None, url is fetched here.
 
     Returns:
         bool: True if the URL was processed successfully (even if no changes found), False if an error occurred.
@@ -40,12 +59,7 @@ def process_url(url: str, cfg: Config) -> bool:
 
     # 1. Fetch HTML
     try:
-        html_content = fetcher.fetch_html(
-            url=url,
-            timeout=cfg.request_timeout,
-            retries=cfg.request_retries,
-            delay=cfg.request_retry_delay
-        )
+        html_content = html_future.result() if html_future is not None else _fetch_url(url, cfg)
         if not html_content:
             notifier.send_admin_alert(f"HTML fetch failed: {url}", config=cfg)
             logger.error(f"HTML fetch failed for {url}.")
@@ -82,7 +96,10 @@ def process_url(url: str, cfg: Config) -> bool:
                  return False
             document_infos = parse_result
             current_pdf_urls = {doc['url'] for doc in document_infos if isinstance(doc, dict) and 'url' in doc}
-            new_pdf_urls = storage.find_new_pdf_urls(url, current_pdf_urls, cfg)
+            if known_urls_session is not None:
+                new_pdf_urls = known_urls_session.find_new_pdf_urls(url, current_pdf_urls)
+            else:
+                new_pdf_urls = storage.find_new_pdf_urls(url, current_pdf_urls, cfg)
 
             if new_pdf_urls:
                 new_documents = [doc for doc in document_infos if isinstance(doc, dict) and doc.get('url') in new_pdf_urls]
@@ -153,21 +170,27 @@ def run_check(cfg: Config) -> bool:
     logger.info("run_check: Starting check process for all configured URLs.")
     overall_success = True
 
-    for url in cfg.target_urls:
-        try:
-            success = process_url(url, cfg)
-            if not success:
-                overall_success = False
-                # Error for this specific URL is already logged by process_url
-                logger.warning(f"Processing failed for URL: {url}")
-        except Exception as e:
-            # Catch unexpected errors during the processing of a single URL
-            logger.exception(f"run_check: An unexpected error occurred while processing URL {url}: {e}")
+    # Fetching is network-bound (and may sleep between retries), so all configured URLs are
+    # fetched concurrently up front; parsing, state updates and notifications stay sequential.
+    fetch_urls = [url for url in dict.fromkeys(cfg.target_urls) if cfg.url_configs.get(url)]
+    with ThreadPoolExecutor(max_workers=max(1, min(len(fetch_urls), MAX_FETCH_WORKERS))) as executor, \
+            storage.KnownUrlsSession(cfg) as known_urls_session: # One known-URLs load/save for the whole run
+        html_futures = {url: executor.submit(_fetch_url, url, cfg) for url in fetch_urls}
+        for url in cfg.target_urls:
             try:
-                notifier.send_admin_alert(f"run_check: Unexpected error processing URL {url}", error=e, config=cfg)
-            except Exception as alert_e:
-                logger.error(f"Failed to send admin alert about the error during URL processing: {alert_e}")
-            overall_success = False # Mark overall process as failed
+                success = process_url(url, cfg, known_urls_session, html_futures.get(url))
+                if not success:
+                    overall_success = False
+                    # Error for this specific URL is already logged by process_url
+                    logger.warning(f"Processing failed for URL: {url}")
+            except Exception as e:
+                # Catch unexpected errors during the processing of a single URL
+                logger.exception(f"run_check: An unexpected error occurred while processing URL {url}: {e}")
+                try:
+                    notifier.send_admin_alert(f"run_check: Unexpected error processing URL {url}", error=e, config=cfg)
+                except Exception as alert_e:
+                    logger.error(f"Failed to send admin alert about the error during URL processing: {alert_e}")
+                overall_success = False # Mark overall process as failed
 
     if overall_success:
         logger.info("run_check: Process completed successfully for all URLs.")
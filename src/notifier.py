@@ -1,3 +1,4 @@
+import functools
 import logging # Import logging
 from slack_sdk import WebClient
 from slack_sdk.errors import SlackApiError
@@ -7,46 +8,43 @@ from .config import load_config, Config # Import load_config
 # Get logger instance for this module
 logger = logging.getLogger(__name__)
 
-# Global variable to hold the client instance (lazy initialized)
-_slack_client: WebClient | None = None
-_slack_config: Config | None = None # To store loaded config
+# Lazily initialized, cached singletons. Only successful results are cached
+# (exceptions propagate through lru_cache uncached), so a failed init is retried
+# on the next call. Tests reset them with cache_clear().
+@functools.lru_cache(maxsize=1)
+def _load_slack_config() -> Config:
+    """Loads the config once and caches it."""
+    return load_config()
+
+@functools.lru_cache(maxsize=1)
+def _build_slack_client(token: str) -> WebClient:
+    """Creates the Slack client once per token and caches it."""
+    client = WebClient(token=token)
+    logger.info("Slack client initialized.")
+    return client
 
 def _get_slack_client() -> WebClient | None:
     """Initializes and returns the Slack client instance."""
-    global _slack_client, _slack_config
-    if _slack_client is None:
-        try:
-            # Load config if not already loaded by this module
-            if _slack_config is None:
-                 _slack_config = load_config()
-
-            if _slack_config.slack_api_token:
-                _slack_client = WebClient(token=_slack_config.slack_api_token)
-                logger.info("Slack client initialized.")
-            else:
-                logger.warning("SLACK_API_TOKEN is not set. Slack notifications disabled.")
-                # Keep _slack_client as None
-        except ValueError as e:
-            logger.error(f"Failed to load config for Slack client: {e}. Slack notifications disabled.")
-            # Keep _slack_client as None
-        except Exception as e:
-             logger.exception(f"Unexpected error initializing Slack client: {e}. Slack notifications disabled.")
-             # Keep _slack_client as None
-    return _slack_client
+    try:
+        slack_config = _load_slack_config()
+        if slack_config.slack_api_token:
+            return _build_slack_client(slack_config.slack_api_token)
+        logger.warning("SLACK_API_TOKEN is not set. Slack notifications disabled.")
+    except ValueError as e:
+        logger.error(f"Failed to load config for Slack client: {e}. Slack notifications disabled.")
+    except Exception as e:
+        logger.exception(f"Unexpected error initializing Slack client: {e}. Slack notifications disabled.")
+    return None
 
 def _get_config() -> Config | None:
-    """Loads and returns the config, storing it globally."""
-    global _slack_config
-    if _slack_config is None:
-        try:
-            _slack_config = load_config()
-        except ValueError as e:
-            logger.error(f"Failed to load config: {e}")
-            return None
-        except Exception as e:
-            logger.exception(f"Unexpected error loading config: {e}")
-            return None
-    return _slack_config
+    """Loads and returns the config (cached after the first successful load)."""
+    try:
+        return _load_slack_config()
+    except ValueError as e:
+        logger.error(f"Failed to load config: {e}")
+    except Exception as e:
+        logger.exception(f"Unexpected error loading config: {e}")
+    return None
 
 
 def _send_message(channel_id: str, text: str, blocks: list | None = None) -> bool:
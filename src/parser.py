@@ -1,16 +1,154 @@
 import re
-from urllib.parse import urljoin
+from functools import lru_cache
+from urllib.parse import urljoin, urlsplit
 from bs4 import BeautifulSoup, SoupStrainer, Tag # Import Tag
-import re # 正規表現モジュールを追加
+from lxml import etree, html as lxml_html
 import logging # Import logging
-from typing import List, Dict, Optional, Any # 型ヒント用 (Optional, Any を追加)
+from typing import List, Dict, Optional, Any, Callable, Iterator, TypedDict # 型ヒント用 (Optional, Any を追加)
 # from .logger import logger # REMOVE direct logger import
 
 # Get logger instance for this module
 logger = logging.getLogger(__name__)
 
+class HospitalDocument(TypedDict):
+    """extract_hospital_document_info が返す文書情報 (main / notifier が dict として参照するため実体は dict)。"""
+    date: str
+    title: str
+    url: str
+
 # PDFリンクを検出するための正規表現 (末尾のクエリパラメータも許容)
 PDF_LINK_PATTERN = re.compile(r"\.pdf(\?.*)?$", re.IGNORECASE)
+# 文書アイテムの日付 ("YYYY.MM.DD") を抽出するための正規表現
+_DATE_RE = re.compile(r'(\d{4}\.\d{2}\.\d{2})')
+
+# urljoin を省略できる単純な相対パス (スキーム・params・フラグメント・空白・バックスラッシュを含まず、
+# // で始まらず、クエリは空でない)
+_SIMPLE_RELATIVE_HREF = re.compile(r"(?!//)[^:;?#\s\\]+(\?[^;#\s]+)?")
+# urljoin が変更せずに返す http(s) の絶対URL (ホストが空でなく、params・フラグメント・空白・バックスラッシュを含まず、
+# クエリは空でない)。末尾の空の '?' / '#' や ';' は urljoin (urlunparse) が除去・正規化するため対象外
+_SIMPLE_ABSOLUTE_HREF = re.compile(r"https?://[^/?#;\s\\\[\]]+(/[^?#;\s\\]*)?(\?[^#\s]+)?")
+
+# BeautifulSoup のパーサー (libxml2 ベースの lxml は html.parser より高速・省メモリ)
+HTML_PARSER = 'lxml'
+
+# extract_pdf_links 用: href を持つ <a> タグのみをツリー化する (他の要素はノードを生成しない)
+_A_STRAINER = SoupStrainer('a', href=True)
+
+# extract_hospital_document_info 用のコンパイル済み XPath (lxml を直接使用)
+# 文書アイテム: class 属性に 'isotope-item' をクラス名 (空白区切りのトークン) として含む div
+# (bs4 の class_='isotope-item' と同じ判定。余分な空白や改行を含む class 属性も一致する)
+_ITEM_XPATH = etree.XPath("//div[contains(concat(' ', normalize-space(@class), ' '), ' isotope-item ')]")
+# extract_hospital_document_info (木構造版) 用の lxml パーサー。空白のみのテキストノードと処理命令はノード化しない
+# (空白のみのテキストは get_text(strip=True) 相当の結果に影響しない)。
+# コメントは残す: 削除すると前後のテキストノードが結合され、strip の結果が変わるため。
+# 入力は UTF-8 のバイト列で渡す (str のままでは XML 宣言付きのページを lxml が拒否するため)。
+# encoding を明示し、ページ内の XML 宣言や <meta charset> による再デコードを防ぐ。
+_LXML_HTML_PARSER = lxml_html.HTMLParser(remove_blank_text=True, remove_pis=True, encoding='utf-8')
+
+# これを超えるサイズのページは DOM を構築せずストリーミング解析する (_HospitalTarget)
+_STREAMING_THRESHOLD = 256 * 1024
+
+# get_text() がテキストとして扱わない要素 (bs4 は script/style/template/rt/rp 内の文字列を別型にして除外する)
+_NON_TEXT_TAGS = ('script', 'style', 'template', 'rt', 'rp')
+# 要素配下のテキストノード (上記要素の内側は除く。smart_strings=False で親要素への参照を持たない素の str を返す)
+_TEXT_XPATH = etree.XPath(
+    ".//text()[not(" + " or ".join(f"ancestor::{tag}" for tag in _NON_TEXT_TAGS) + ")]", smart_strings=False
+)
+
+def _has_class(class_attr: str | None, token: str) -> bool:
+    """
+    class 属性値に token がクラス名 (空白区切りのトークン) として含まれるかを判定する
+    (bs4 の class_=token と同じ判定。余分な空白や改行があっても一致する)。
+    """
+    return class_attr is not None and token in class_attr.split()
+
+def _get_text(element: Any) -> str:
+    """
+    lxml 要素配下のテキストを BeautifulSoup の get_text(strip=True) と同様に取得する
+    (各テキストノードの前後の空白を除去して連結する。text() はコメントを含まず、
+    script/style/template/rt/rp 内のテキストも bs4 と同様に除外する)。
+    """
+    return ''.join(text.strip() for text in _TEXT_XPATH(element))
+
+def _to_html(element: Any) -> str:
+    """lxml 要素をログ出力用のHTML文字列に変換する。"""
+    return lxml_html.tostring(element, encoding='unicode')
+
+def _is_pdf_href(href: str) -> bool:
+    """
+    href がPDFへのリンクかどうかを判定する (PDF_LINK_PATTERN と同じ判定)。
+    末尾4文字のみを小文字化して比較し、URL全体のコピーや正規表現の実行を避ける。
+    クエリ付き ('?' を含む) の場合のみ PDF_LINK_PATTERN にフォールバックする。
+
+    Args:
+        href (str): <a> タグの href 値 (前後の空白は除去済み)。
+
+    Returns:
+        bool: PDFリンクであれば True。
+    """
+    if href[-4:].lower() == '.pdf':
+        return True
+    return '?' in href and PDF_LINK_PATTERN.search(href) is not None
+
+def _has_unsafe_path(path: str) -> bool:
+    """パスに urljoin が正規化する要素 ('.'/'..' セグメントや空セグメント '//') が含まれるかを判定する。"""
+    return '//' in path or '.' in path.split('/') or '..' in path.split('/')
+
+@lru_cache(maxsize=128)
+def _split_base_url(base_url: str) -> tuple[str, str] | None:
+    """
+    base_url を (オリジン 'scheme://netloc', ディレクトリパス) に分解してキャッシュする。
+    同じサイトの多数の href を解決する際に base_url の再解析を避けるため。
+    単純結合できない base_url (http(s) 以外、params 付き、正規化が必要なパス) の場合は None。
+    """
+    parts = urlsplit(base_url)
+    if parts.scheme not in ('http', 'https') or not parts.netloc or ';' in parts.path or _has_unsafe_path(parts.path):
+        return None
+    return f"{parts.scheme}://{parts.netloc}", parts.path[:parts.path.rfind('/') + 1] or '/'
+
+def _to_absolute_url(base_url: str, href: str) -> str:
+    """
+    href を絶対URLに変換する (urljoin と同じ結果を返す)。
+    urljoin が変更しない単純な http(s) の絶対URLはそのまま返し、単純な相対パス/ルート相対パスは
+    urljoin (内部で urlparse を2回行う) を省略してキャッシュ済みの base_url 分解結果と文字列結合する。
+    それ以外 (空のクエリ/フラグメント、'..' 等) は urljoin に任せる。
+
+    Args:
+        base_url (str): 相対パスを解決するための基準URL。
+        href (str): <a> タグの href 値 (前後の空白は除去済み)。
+
+    Returns:
+        str: 絶対URL。
+    """
+    if _SIMPLE_ABSOLUTE_HREF.fullmatch(href):
+        return href
+    base = _split_base_url(base_url)
+    if base is not None and _SIMPLE_RELATIVE_HREF.fullmatch(href) and not _has_unsafe_path(href.partition('?')[0]):
+        origin, base_dir = base
+        return origin + href if href.startswith('/') else origin + base_dir + href
+    return urljoin(base_url, href) # '..' やスキーム付き等はライブラリに任せる
+
+def _iter_pdf_links(html_content: str, base_url: str) -> Iterator[str]:
+    """
+    HTMLコンテンツ中のPDFリンクを絶対URLに変換し、重複を除いて文書内の出現順に1件ずつ返す。
+    集合の構築は呼び出し側に任せる (大きなHTMLでも中間リストを作らない)。
+    """
+    # href 付きの <a> タグのみを解析対象とする (効率化)
+    soup = BeautifulSoup(html_content, HTML_PARSER, parse_only=_A_STRAINER)
+
+    seen: set[str] = set()
+    for a_tag in soup.find_all('a'):
+        # Strainer は一致した <a href> の子孫もすべて残すため、入れ子の <a> は href を持たないことがある
+        href = a_tag.get('href')
+        if not isinstance(href, str):
+            continue
+        href = href.strip()
+        if not _is_pdf_href(href): # 空の href もここで除外される
+            continue
+        url = _to_absolute_url(base_url, href)
+        if url not in seen:
+            seen.add(url)
+            yield url
 
 def extract_pdf_links(html_content: str, base_url: str) -> set[str]:
     """
@@ -21,36 +159,14 @@ def extract_pdf_links(html_content: str, base_url: str) -> set[str]:
         base_url (str): HTMLコンテンツが取得された元のページのURL。相対パスを解決するために使用。
 
     Returns:
-        set[str]: 抽出されたPDFファイルの絶対URLのセット。
+        set[str]: 抽出されたPDFファイルの絶対URLのセット (呼び出し側で変更可能な新しいセット)。
     """
     logger.info(f"HTML解析開始: {base_url} からPDFリンクを抽出します。")
-    pdf_links: set[str] = set()
 
     try:
-        # <a> タグのみを解析対象とする (効率化)
-        only_a_tags = SoupStrainer("a")
-        soup = BeautifulSoup(html_content, 'html.parser', parse_only=only_a_tags)
-
-        for a_tag in soup.find_all('a', href=True): # href=True should yield Tags
-            # Explicit check for mypy
-            if isinstance(a_tag, Tag):
-                href_value = a_tag.get('href') # Use .get() for safer access
-                # Ensure href_value is a string and strip it
-                if isinstance(href_value, str):
-                    href = href_value.strip()
-                elif isinstance(href_value, list): # Handle case where href might be a list (less common)
-                    href = href_value[0].strip() if href_value else ""
-                else:
-                    href = "" # Skip if href is not a string or list
-
-                if href: # 空のhrefは無視
-                    # PDFリンクかどうかを正規表現で判定
-                    if PDF_LINK_PATTERN.search(href):
-                        # 相対URLを絶対URLに変換
-                        absolute_url = urljoin(base_url, href)
-                        if absolute_url not in pdf_links:
-                             logger.debug(f"PDFリンク発見: {absolute_url} (元: {href})")
-                             pdf_links.add(absolute_url)
+        pdf_links = set(_iter_pdf_links(html_content, base_url))
+        if logger.isEnabledFor(logging.DEBUG): # ソートはデバッグ時のみ
+            logger.debug(f"PDFリンク発見: {sorted(pdf_links)}")
 
         logger.info(f"HTML解析完了: {len(pdf_links)} 件のユニークなPDFリンクを発見しました。")
         return pdf_links
@@ -60,88 +176,234 @@ def extract_pdf_links(html_content: str, base_url: str) -> set[str]:
         return set() # エラー時は空のセットを返す
 
 
-def extract_hospital_document_info(html_content: str, base_url: str) -> List[Dict[str, str]]:
+def _make_hospital_document(
+    raw_date_text: str | None,
+    has_link_container: bool,
+    href: str | None,
+    link_text: str,
+    base_url: str,
+    describe_item: Callable[[], str],
+) -> HospitalDocument | None:
+    """
+    1件の文書アイテムから取り出した生の値を検証し、文書情報の辞書を組み立てる。
+    木構造版とストリーミング版の extract_hospital_document_info で共通に使用する。
+
+    Args:
+        raw_date_text (str | None): div.fs13 のテキスト (div が無い場合は None)。
+        has_link_container (bool): p.fs_p が存在したかどうか。
+        href (str | None): p.fs_p 内の最初の a[href] の href 値 (前後の空白は除去済み。a が無い場合は None)。
+        link_text (str): その <a> タグのテキスト。
+        base_url (str): 相対パス解決用の基準URL。
+        describe_item (Callable[[], str]): ログ出力用にアイテムのHTMLを返す関数 (ログ出力時のみ呼ばれる)。
+
+    Returns:
+        HospitalDocument | None: 'date', 'title', 'url' を持つ辞書。いずれかが欠けている場合は None。
+    """
+    date_str: str | None = None
+    title: str | None = None
+    pdf_url: str | None = None
+
+    # 1. 日付の抽出 (fs13クラスのdiv)
+    if raw_date_text is not None:
+        # 日付形式 "YYYY.MM.DD" を正規表現で抽出
+        match = _DATE_RE.search(raw_date_text)
+        if match:
+            date_str = match.group(1)
+        else:
+            logger.warning(f"日付形式が見つかりません: '{raw_date_text}' in item: {describe_item()[:100]}...")
+
+    # 2. PDFリンクとタイトルの抽出 (p.fs_p > a)
+    if has_link_container:
+        if href is not None:
+            # PDFリンクかどうかを確認
+            if _is_pdf_href(href):
+                pdf_url = _to_absolute_url(base_url, href) # 絶対URLに変換
+                title = link_text # 抽出したテキストをタイトルとする
+            else:
+                logger.debug(f"PDFではないリンクをスキップ: {href}")
+        else:
+             logger.debug(f"リンクタグ(a)が見つかりません in p.fs_p: {describe_item()[:100]}...")
+    else:
+        logger.debug(f"リンクコンテナ(p.fs_p)が見つかりません in item: {describe_item()[:100]}...")
+
+    # 3. 日付、タイトル、URLがすべて取得できた場合のみ返す
+    if date_str and title and pdf_url:
+        logger.debug(f"文書情報発見: Date={date_str}, Title={title[:30]}..., URL={pdf_url}")
+        return {
+            'date': date_str,
+            'title': title,
+            'url': pdf_url
+        }
+
+    # 何かが見つからなかった場合、デバッグ用にログ出力
+    missing_parts = []
+    if not date_str: missing_parts.append("日付")
+    if not title: missing_parts.append("タイトル")
+    if not pdf_url: missing_parts.append("URL")
+    # アイテム内に p.fs_p や a タグが存在しない場合などはログを出さないようにする
+    if has_link_container and href is not None and missing_parts:
+       logger.debug(f"文書情報の一部が見つかりませんでした ({', '.join(missing_parts)}が見つかりません): Item HTML (partial) = {describe_item()[:200]}...")
+    return None
+
+
+def _document_from_item(item: Any, base_url: str) -> HospitalDocument | None:
+    """
+    lxml の文書アイテム要素 (div.isotope-item) から文書情報を抽出する。
+    div.fs13 / p.fs_p / p.fs_p 内の a[href] を、アイテムの1回の走査 (文書順) でまとめて探す。
+    """
+    date_div = link_container = link_tag = None
+    for element in item.iter('div', 'p', 'a'):
+        if element.tag == 'a':
+            #    <p class="fs_p ic_140"> の中の <a> タグを探す
+            if (link_tag is None and link_container is not None and element.get('href') is not None
+                    and any(ancestor is link_container for ancestor in element.iterancestors('p'))):
+                link_tag = element
+        elif date_div is None and element.tag == 'div' and _has_class(element.get('class'), 'fs13'):
+            date_div = element
+        elif link_container is None and element.tag == 'p' and _has_class(element.get('class'), 'fs_p'):
+            link_container = element
+        if date_div is not None and link_tag is not None:
+            break # 必要な要素が揃ったら残りの走査を省略
+
+    # 内部の span タグなどを無視してテキストを連結し、前後の空白を削除
+    raw_date_text = _get_text(date_div) if date_div is not None else None
+    href: str | None = None
+    link_text = ""
+    if link_tag is not None:
+        href = link_tag.get('href', '').strip()
+        link_text = _get_text(link_tag) # <a> タグのテキストを取得
+
+    return _make_hospital_document(
+        raw_date_text, link_container is not None, href, link_text, base_url, lambda: _to_html(item)
+    )
+
+
+class _HospitalTarget:
+    """
+    lxml の parser target (SAX 風コールバック) として文書アイテムを逐次抽出する。
+    DOM を構築せず、アイテム単位の小さな状態だけを保持する。close() で文書情報のリストを返す。
+    判定基準とテキストの取得方法 (_NON_TEXT_TAGS 内のテキストを除外) は _document_from_item (XPath 版) と同じ
+    (ただしアイテム div が入れ子になった壊れたHTMLでは、内側のアイテムは外側の一部として扱われる)。
+    """
+
+    def __init__(self, base_url: str):
+        self._base_url = base_url
+        self._documents: List[HospitalDocument] = []
+        self._depth = 0 # 現在の要素の深さ
+        self._text: List[str] = [] # 未確定のテキストノード (data() は分割して呼ばれることがある)
+        self._item_depth: int | None = None # 文書アイテム div の深さ (アイテム外では None)
+        self._non_text_depth: int | None = None # _NON_TEXT_TAGS 要素の深さ (その内側のテキストは無視する)
+        self._reset_item()
+
+    def _reset_item(self) -> None:
+        self._date_depth: int | None = None
+        self._date_parts: List[str] | None = None
+        self._container_depth: int | None = None
+        self._has_container = False
+        self._link_depth: int | None = None
+        self._href: str | None = None
+        self._link_parts: List[str] = []
+
+    def _flush_text(self) -> None:
+        """テキストノード1つ分を確定し、取得中の日付/リンクテキストに追加する (get_text(strip=True) 相当)。"""
+        if not self._text:
+            return
+        piece = ''.join(self._text).strip()
+        self._text.clear()
+        if self._date_depth is not None and self._date_parts is not None:
+            self._date_parts.append(piece)
+        if self._link_depth is not None:
+            self._link_parts.append(piece)
+
+    def start(self, tag: str, attrib: Dict[str, str]) -> None:
+        self._flush_text()
+        self._depth += 1
+        if self._non_text_depth is None and tag in _NON_TEXT_TAGS:
+            self._non_text_depth = self._depth
+        if self._item_depth is None:
+            # 'isotope-item' クラスを持つ div でアイテム開始 (木構造版の _ITEM_XPATH と同じトークン一致)
+            if tag == 'div' and _has_class(attrib.get('class'), 'isotope-item'):
+                self._item_depth = self._depth
+            return
+        if tag == 'div' and self._date_parts is None and _has_class(attrib.get('class'), 'fs13'):
+            self._date_depth = self._depth
+            self._date_parts = []
+        if tag == 'p' and not self._has_container and _has_class(attrib.get('class'), 'fs_p'):
+            self._container_depth = self._depth
+            self._has_container = True
+        elif (tag == 'a' and self._container_depth is not None and self._href is None
+              and attrib.get('href') is not None):
+            self._link_depth = self._depth
+            self._href = attrib['href'].strip()
+
+    def end(self, tag: str) -> None:
+        self._flush_text()
+        if self._depth == self._non_text_depth:
+            self._non_text_depth = None
+        if self._depth == self._date_depth:
+            self._date_depth = None
+        if self._depth == self._link_depth:
+            self._link_depth = None
+        if self._depth == self._container_depth:
+            self._container_depth = None
+        if self._depth == self._item_depth:
+            document = _make_hospital_document(
+                ''.join(self._date_parts) if self._date_parts is not None else None,
+                self._has_container, self._href, ''.join(self._link_parts), self._base_url,
+                lambda: "(streaming parse)",
+            )
+            if document:
+                self._documents.append(document)
+            self._item_depth = None
+            self._reset_item()
+        self._depth -= 1
+
+    def data(self, data: str) -> None:
+        if self._item_depth is not None and self._non_text_depth is None:
+            self._text.append(data)
+
+    def comment(self, text: str) -> None:
+        self._flush_text() # コメントはテキストノードを区切るが、テキストには含めない
+
+    def close(self) -> List[HospitalDocument]:
+        return self._documents
+
+
+def _extract_hospital_streaming(html_content: str, base_url: str) -> List[HospitalDocument]:
+    """
+    _HospitalTarget を使い、DOM を構築せずに文書情報を抽出する (大きなページ用)。
+    木構造版と同じく UTF-8 のバイト列で渡す (XML 宣言付きのページに対応するため)。
+    """
+    parser = etree.HTMLParser(target=_HospitalTarget(base_url), encoding='utf-8')
+    return etree.fromstring(html_content.encode('utf-8'), parser)
+
+
+def extract_hospital_document_info(html_content: str, base_url: str) -> List[HospitalDocument]:
     """
     hospital.or.jp/site/ministry/ のHTML構造から文書情報を抽出する。
     日付、タイトル、PDFの絶対URLを含む辞書のリストを返す。
+    BeautifulSoup を介さず lxml を直接使用し、コンパイル済み XPath で走査する。
+    _STREAMING_THRESHOLD を超える大きなページは DOM を構築しないストリーミング解析を行う。
 
     Args:
         html_content (str): 解析対象のHTMLコンテンツ。
         base_url (str): HTMLコンテンツが取得された元のページのURL。
 
     Returns:
-        List[Dict[str, str]]: 抽出された文書情報のリスト。各辞書は 'date', 'title', 'url' キーを持つ。
+        List[HospitalDocument]: 抽出された文書情報のリスト。各辞書は 'date', 'title', 'url' キーを持つ。
     """
     logger.info(f"HTML解析開始 (Hospital Site): {base_url} から文書情報を抽出します。")
-    documents: List[Dict[str, str]] = []
 
     try:
-        soup = BeautifulSoup(html_content, 'html.parser')
-
-        # '.col-12.isotope-item' クラスを持つ div をすべて検索
-        items = soup.find_all('div', class_='col-12 isotope-item') # Use class_
-
-        for item in items:
-            date_str: str | None = None
-            title: str | None = None
-            pdf_url: str | None = None
-
-            # 1. 日付の抽出 (fs13クラスのdiv)
-            date_div = item.find('div', class_='fs13')
-            if date_div:
-                # .text で取得し、内部の span タグなどを無視し、前後の空白を削除
-                raw_date_text = date_div.get_text(strip=True)
-                # 日付形式 "YYYY.MM.DD" を正規表現で抽出
-                match = re.search(r'(\d{4}\.\d{2}\.\d{2})', raw_date_text)
-                if match:
-                    date_str = match.group(1)
-                else:
-                    logger.warning(f"日付形式が見つかりません: '{raw_date_text}' in item: {str(item)[:100]}...")
-
-            # 2. PDFリンクとタイトルの抽出 (p.fs_p > a)
-            #    <p class="fs_p ic_140"> の中の <a> タグを探す
-            link_container = item.find('p', class_='fs_p')
-            if link_container:
-                link_tag = link_container.find('a', href=True)
-                if link_tag and isinstance(link_tag, Tag):
-                    href_value = link_tag.get('href')
-                    link_text = link_tag.get_text(strip=True) # <a> タグのテキストを取得
-
-                    if isinstance(href_value, str):
-                        href = href_value.strip()
-                        # PDFリンクかどうかを確認 (既存のパターンを使用)
-                        if PDF_LINK_PATTERN.search(href):
-                            pdf_url = urljoin(base_url, href) # 絶対URLに変換
-                            title = link_text # 抽出したテキストをタイトルとする
-                        else:
-                            logger.debug(f"PDFではないリンクをスキップ: {href}")
-                    else:
-                        # href が文字列でない場合は警告 (通常は文字列のはず)
-                        logger.warning(f"不正な href 属性値が見つかりました: {href_value} in item: {str(item)[:100]}...")
-                else:
-                     logger.debug(f"リンクタグ(a)が見つかりません in p.fs_p: {str(link_container)[:100]}...")
-            else:
-                logger.debug(f"リンクコンテナ(p.fs_p)が見つかりません in item: {str(item)[:100]}...")
-
-
-            # 3. 日付、タイトル、URLがすべて取得できた場合のみリストに追加
-            if date_str and title and pdf_url:
-                documents.append({
-                    'date': date_str,
-                    'title': title,
-                    'url': pdf_url
-                })
-                logger.debug(f"文書情報発見: Date={date_str}, Title={title[:30]}..., URL={pdf_url}")
-            else:
-                 # 何かが見つからなかった場合、デバッグ用にログ出力
-                 missing_parts = []
-                 if not date_str: missing_parts.append("日付")
-                 if not title: missing_parts.append("タイトル")
-                 if not pdf_url: missing_parts.append("URL")
-                 # アイテム内に p.fs_p や a タグが存在しない場合などはログを出さないようにする
-                 if link_container and link_tag and missing_parts:
-                    logger.debug(f"文書情報の一部が見つかりませんでした ({', '.join(missing_parts)}が見つかりません): Item HTML (partial) = {str(item)[:200]}...")
-
+        # lxml は空文書を解析できない (ParserError) ため、先に空入力を除外する
+        if not html_content or html_content.isspace():
+            documents: List[HospitalDocument] = []
+        elif len(html_content) > _STREAMING_THRESHOLD:
+            documents = _extract_hospital_streaming(html_content, base_url)
+        else:
+            tree = lxml_html.fromstring(html_content.encode('utf-8'), parser=_LXML_HTML_PARSER)
+            # 'isotope-item' クラスを持つ div をすべて検索
+            documents = [doc for item in _ITEM_XPATH(tree) if (doc := _document_from_item(item, base_url))]
 
         logger.info(f"HTML解析完了 (Hospital Site): {len(documents)} 件の文書情報を抽出しました。")
         return documents
@@ -167,7 +429,7 @@ def extract_latest_chuikyo_meeting(html_content: str, base_url: str) -> Optional
     meeting_info: Dict[str, Any] = {}
 
     try:
-        soup = BeautifulSoup(html_content, 'html.parser')
+        soup = BeautifulSoup(html_content, HTML_PARSER)
 
         # <table class="m-tableFlex"> を探す
         table = soup.find('table', class_='m-tableFlex')
@@ -175,10 +437,13 @@ def extract_latest_chuikyo_meeting(html_content: str, base_url: str) -> Optional
             logger.warning("会議情報テーブル (<table class='m-tableFlex'>) が見つかりません。")
             return None
 
-        # *最初* の <tr> (最新会議のデータ行) を探す (CSSセレクタを使用)
-        target_row = table.select_one('tbody > tr:nth-of-type(2)') # tbody 直下の *2番目* の tr (データ行) を取得
+        # *最初* の <tr> (最新会議のデータ行) を探す
+        # tbody 直下の *2番目* の tr (データ行) を取得 (CSSセレクタ 'tbody > tr:nth-of-type(2)' 相当を find で高速に)
+        tbody = table.find('tbody')
+        rows = tbody.find_all('tr', recursive=False, limit=2) if isinstance(tbody, Tag) else []
+        target_row = rows[1] if len(rows) > 1 else None
         if not target_row or not isinstance(target_row, Tag):
-            logger.warning("会議情報テーブルの tbody 内に最初の行 (データ行 <tr>) が見つかりません (CSS Selector failed)。")
+            logger.warning("会議情報テーブルの tbody 内に最初の行 (データ行 <tr>) が見つかりません。")
             return None
 
         # <td> または <th> 要素を取得 (最初の列が th の可能性があるため)
@@ -212,7 +477,11 @@ def extract_latest_chuikyo_meeting(html_content: str, base_url: str) -> Optional
         topics_container = tds[2] if len(tds) > 2 and isinstance(tds[2], Tag) else None
         if topics_container:
             # ol.m-listMarker > li を探す
-            topic_items = topics_container.select('ol.m-listMarker > li')
+            topic_items = [
+                li
+                for ol in topics_container.find_all('ol', class_='m-listMarker')
+                for li in ol.find_all('li', recursive=False)
+            ]
             if topic_items:
                  for item in topic_items:
                      if isinstance(item, Tag):
@@ -237,7 +506,7 @@ def extract_latest_chuikyo_meeting(html_content: str, base_url: str) -> Optional
             if link_tag and isinstance(link_tag, Tag):
                 href_value = link_tag.get('href')
                 if isinstance(href_value, str):
-                    meeting_info['minutes_url'] = urljoin(base_url, href_value.strip())
+                    meeting_info['minutes_url'] = _to_absolute_url(base_url, href_value.strip())
                     meeting_info['minutes_text'] = link_tag.get_text(strip=True)
 
         # 5. 資料リンク (オプション)
@@ -249,7 +518,7 @@ def extract_latest_chuikyo_meeting(html_content: str, base_url: str) -> Optional
             if link_tag and isinstance(link_tag, Tag):
                 href_value = link_tag.get('href')
                 if isinstance(href_value, str):
-                    meeting_info['materials_url'] = urljoin(base_url, href_value.strip())
+                    meeting_info['materials_url'] = _to_absolute_url(base_url, href_value.strip())
                     meeting_info['materials_text'] = link_tag.get_text(strip=True)
 
         # 必須情報が揃っているか最終確認 (id, date, topics)
@@ -1,24 +1,116 @@
+import functools
+import gzip
 import json
 import os
-from typing import Set, Dict, List, Optional # Dict, List, Optional を追加
+import tempfile
+from itertools import repeat
+from types import ModuleType
+from typing import Set, Dict, List, Optional, Tuple # Dict, List, Optional を追加
 import logging # Import logging
 from google.cloud import storage
-from google.cloud.exceptions import NotFound
+from google.cloud.exceptions import NotFound, PreconditionFailed
+try:
+    import orjson as _orjson # Fast JSON encode/decode (optional)
+    orjson: Optional[ModuleType] = _orjson
+except ImportError: # pragma: no cover - fall back to the stdlib json module
+    orjson = None
 # from .logger import logger # REMOVE direct logger import
 from .config import Config # Import Config class
 
 # Get logger instance for this module
 logger = logging.getLogger(__name__)
 
-# GCS Client (initialized once per function invocation if needed)
-storage_client = None
+# Lazily initialized, cached GCS handles (reused across load/save calls in one
+# instance, e.g. find_new_pdf_urls loads then saves). Only successful results are
+# cached, so a failed init is retried. Tests reset them with cache_clear().
+@functools.lru_cache(maxsize=1)
+def _get_gcs_client() -> storage.Client:
+    """Initializes the GCS client once (credential discovery is the expensive part) and caches it."""
+    return storage.Client()
 
-def _get_gcs_client():
-    """Initializes and returns a GCS client."""
-    global storage_client
-    if storage_client is None:
-        storage_client = storage.Client()
-    return storage_client
+@functools.lru_cache(maxsize=8)
+def _get_bucket(bucket_name: str) -> storage.Bucket:
+    """Returns a cached Bucket handle for bucket_name (no API call; blobs are created per object)."""
+    return _get_gcs_client().bucket(bucket_name)
+
+_GZIP_MAGIC = b'\x1f\x8b' # First two bytes of any gzip stream
+
+def _dumps_json(data) -> bytes:
+    """
+    Serializes state to UTF-8 JSON bytes (2-space indent, keys sorted, non-ASCII kept as-is).
+    Uses orjson when available; the output is byte-identical to the json fallback.
+    """
+    if orjson is not None:
+        return orjson.dumps(data, option=orjson.OPT_INDENT_2 | orjson.OPT_SORT_KEYS)
+    return json.dumps(data, ensure_ascii=False, indent=2, sort_keys=True).encode('utf-8')
+
+def _loads_json(data: bytes):
+    """
+    Parses JSON bytes, using orjson when available.
+    Decode errors are raised as json.JSONDecodeError (orjson.JSONDecodeError subclasses it).
+    Gzip-compressed input (see _upload_json) is decompressed first, in case it was
+    downloaded without GCS's decompressive transcoding.
+    """
+    if data[:2] == _GZIP_MAGIC:
+        data = gzip.decompress(data)
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+def _upload_json(blob: storage.Blob, data, **kwargs):
+    """
+    Uploads state as gzip-compressed JSON with Content-Encoding: gzip (URL lists compress
+    several-fold). download_as_bytes() transparently returns the decompressed JSON.
+    mtime=0 keeps the compressed bytes deterministic for the same data.
+
+    Args:
+        blob (storage.Blob): Destination object.
+        data: JSON-serializable state.
+        **kwargs: Passed through to upload_from_string (e.g. if_generation_match).
+    """
+    blob.content_encoding = 'gzip' # Sent as object metadata with the upload
+    blob.upload_from_string(gzip.compress(_dumps_json(data), mtime=0), content_type='application/json', **kwargs)
+
+def _atomic_write(path: str, payload: bytes):
+    """
+    Writes bytes to a local file atomically: the payload goes to a uniquely named temp file
+    in the same directory which then replaces the target, so readers never see a half-written
+    JSON file and concurrent writers never share (and clobber) a temp file.
+
+    Args:
+        path (str): Destination file path. Its parent directory is created if needed.
+        payload (bytes): Encoded content to write.
+    """
+    dir_name = os.path.dirname(path)
+    if dir_name:
+        os.makedirs(dir_name, exist_ok=True)
+    # Same directory as the target, so os.replace stays a rename within one filesystem
+    tmp_file = tempfile.NamedTemporaryFile(dir=dir_name or '.', prefix=f"{os.path.basename(path)}.",
+                                           suffix='.tmp', delete=False)
+    try:
+        with tmp_file:
+            tmp_file.write(payload)
+        os.replace(tmp_file.name, path)
+    except BaseException:
+        # Don't leave a stray temp file behind on failure
+        if os.path.exists(tmp_file.name):
+            os.remove(tmp_file.name)
+        raise
+
+def _validate_known_urls(loaded_data, source: str) -> Dict[str, List[str]]:
+    """
+    Checks decoded known-URLs data is a dict of string -> list of strings.
+    Invalid data is logged and treated as empty. Valid data is returned as-is (no copy).
+    """
+    if not isinstance(loaded_data, dict):
+        logger.error(f"Invalid format in {source}. Expected a JSON dictionary.")
+        return {}
+    for key, value in loaded_data.items():
+        # map(isinstance, ...) runs the per-URL check in C instead of a generator frame
+        if not (isinstance(key, str) and isinstance(value, list) and all(map(isinstance, value, repeat(str)))):
+            logger.error(f"Invalid structure in {source} for key '{key}'. Expected list of strings as value.")
+            return {}
+    return loaded_data
 
 def load_known_urls(config: Config) -> Dict[str, List[str]]:
     """
@@ -37,42 +129,41 @@ def load_known_urls(config: Config) -> Dict[str, List[str]]:
         Exception: For critical storage download errors (treated as fatal for GCS).
                    JSON parsing errors or invalid format errors are logged but return an empty dict.
     """
+    return load_known_urls_with_generation(config)[0]
+
+def load_known_urls_with_generation(config: Config) -> Tuple[Dict[str, List[str]], Optional[int]]:
+    """
+    Same as load_known_urls, but also returns the GCS generation of the object that was read,
+    for a later save_known_urls(..., if_generation_match=generation).
+
+    Returns:
+        Tuple[Dict[str, List[str]], Optional[int]]: (known URLs dict, generation). The generation is 0
+            if the GCS object doesn't exist yet (so the save only creates it if still absent), and
+            None for local files (no guard).
+
+    Raises:
+        Exception: For critical storage download errors, as in load_known_urls.
+    """
     known_urls_dict: Dict[str, List[str]] = {}
+    generation: Optional[int] = None
     # Use the specific filename from config (assuming config.known_urls_file exists)
     storage_path = getattr(config, 'known_urls_file', None)
 
     if config.gcs_bucket_name and storage_path:
         # Use GCS
-        client = _get_gcs_client()
-        bucket = client.bucket(config.gcs_bucket_name)
+        bucket = _get_bucket(config.gcs_bucket_name)
         blob = bucket.blob(storage_path) # Use storage_path as object name
 
         try:
             logger.info(f"Attempting to load known PDF URLs from gs://{config.gcs_bucket_name}/{storage_path}")
-            json_data = blob.download_as_string()
-            loaded_data = json.loads(json_data)
-            if isinstance(loaded_data, dict):
-                # Validate structure: keys are strings, values are lists of strings
-                valid_data = True
-                temp_dict = {}
-                for key, value in loaded_data.items():
-                    if isinstance(key, str) and isinstance(value, list) and all(isinstance(item, str) for item in value):
-                         temp_dict[key] = value # Keep as list
-                    else:
-                        valid_data = False
-                        logger.error(f"Invalid structure in known_urls data for key '{key}'. Expected list of strings as value.")
-                        break
-                if valid_data:
-                    known_urls_dict = temp_dict
-                    logger.info(f"Loaded known PDF URLs for {len(known_urls_dict)} target URLs from GCS.")
-                else:
-                     logger.error(f"Invalid format in GCS object gs://{config.gcs_bucket_name}/{storage_path}. Expected a JSON dictionary of string keys to list-of-string values.")
-                     # Treat format error as non-fatal, return empty dict
-            else:
-                logger.error(f"Invalid format in GCS object gs://{config.gcs_bucket_name}/{storage_path}. Expected a JSON dictionary.")
-                # Treat format error as non-fatal, return empty dict
+            json_data = blob.download_as_bytes()
+            generation = blob.generation # Set from the download response headers
+            known_urls_dict = _validate_known_urls(_loads_json(json_data), f"GCS object gs://{config.gcs_bucket_name}/{storage_path}")
+            if known_urls_dict:
+                logger.info(f"Loaded known PDF URLs for {len(known_urls_dict)} target URLs from GCS.")
         except NotFound:
             logger.info(f"GCS object gs://{config.gcs_bucket_name}/{storage_path} not found. Assuming first run or empty state.")
+            generation = 0 # Only create the object if it is still absent
         except json.JSONDecodeError as e:
             logger.error(f"Failed to decode JSON from GCS object gs://{config.gcs_bucket_name}/{storage_path}: {e}")
             # Treat JSON decode error as non-fatal, return empty dict
@@ -87,26 +178,11 @@ def load_known_urls(config: Config) -> Dict[str, List[str]]:
         local_file_path = storage_path # Simplistic assumption
         try:
             logger.info(f"Attempting to load known PDF URLs from local file: {local_file_path}")
-            with open(local_file_path, 'r', encoding='utf-8') as f:
-                loaded_data = json.load(f)
-                if isinstance(loaded_data, dict):
-                     # Validate structure (similar to GCS)
-                    valid_data = True
-                    temp_dict = {}
-                    for key, value in loaded_data.items():
-                        if isinstance(key, str) and isinstance(value, list) and all(isinstance(item, str) for item in value):
-                            temp_dict[key] = value
-                        else:
-                            valid_data = False
-                            logger.error(f"Invalid structure in local known_urls data for key '{key}'.")
-                            break
-                    if valid_data:
-                        known_urls_dict = temp_dict
-                        logger.info(f"Loaded known PDF URLs for {len(known_urls_dict)} target URLs from local file.")
-                    else:
-                        logger.error(f"Invalid format in local file {local_file_path}. Expected a dict of string: list[string].")
-                else:
-                    logger.error(f"Invalid format in local file {local_file_path}. Expected a JSON dictionary.")
+            with open(local_file_path, 'rb') as f:
+                loaded_data = _loads_json(f.read())
+            known_urls_dict = _validate_known_urls(loaded_data, f"local file {local_file_path}")
+            if known_urls_dict:
+                logger.info(f"Loaded known PDF URLs for {len(known_urls_dict)} target URLs from local file.")
         except FileNotFoundError:
             logger.info(f"Local file {local_file_path} not found. Assuming first run or empty state.")
         except json.JSONDecodeError as e:
@@ -131,23 +207,28 @@ def load_known_urls(config: Config) -> Dict[str, List[str]]:
         else:
             logger.error("Storage path (known_urls_file) is not configured.")
 
-    return known_urls_dict
+    return known_urls_dict, generation
 
 
-def save_known_urls(known_urls_dict: Dict[str, List[str]], config: Config):
+def save_known_urls(known_urls_dict: Dict[str, List[str]], config: Config, if_generation_match: Optional[int] = None):
     """
     Saves the dictionary of known PDF URLs (keyed by target URL)
     to Google Cloud Storage or a local file.
+    The lists are written as-is: they are kept sorted when URLs are merged in
+    (_merge_known_urls), so they are not re-sorted on every save.
 
     Args:
-        known_urls_dict (Dict[str, List[str]]): The dictionary of URLs to save.
+        known_urls_dict (Dict[str, List[str]]): The dictionary of URLs to save (each list sorted).
         config (Config): Application configuration.
+        if_generation_match (Optional[int]): GCS only. Write only if the object is still at this
+            generation (see load_known_urls_with_generation); None writes unconditionally.
+
+    Raises:
+        PreconditionFailed: If the GCS object changed since if_generation_match was read.
+                            Other save errors are logged, not raised.
     """
     storage_path = getattr(config, 'known_urls_file', None)
 
-    # Sort lists within the dictionary for consistent output (optional but good practice)
-    sorted_dict = {url: sorted(pdf_list) for url, pdf_list in known_urls_dict.items()}
-
     # Determine storage method based on config
     # Use GCS if bucket name AND storage path are provided
     use_gcs = bool(config.gcs_bucket_name and storage_path)
@@ -156,13 +237,14 @@ def save_known_urls(known_urls_dict: Dict[str, List[str]], config: Config):
 
     if use_gcs:
         # --- Use GCS ---
-        client = _get_gcs_client()
-        bucket = client.bucket(config.gcs_bucket_name)
+        bucket = _get_bucket(config.gcs_bucket_name)
         blob = bucket.blob(storage_path)
+        upload_kwargs = {} if if_generation_match is None else {'if_generation_match': if_generation_match}
         try:
-            json_data = json.dumps(sorted_dict, ensure_ascii=False, indent=2)
-            blob.upload_from_string(json_data, content_type='application/json')
-            logger.info(f"Saved known PDF URLs for {len(sorted_dict)} target URLs to gs://{config.gcs_bucket_name}/{storage_path}")
+            _upload_json(blob, known_urls_dict, **upload_kwargs)
+            logger.info(f"Saved known PDF URLs for {len(known_urls_dict)} target URLs to gs://{config.gcs_bucket_name}/{storage_path}")
+        except PreconditionFailed:
+            raise # Another instance wrote in between: the caller re-reads and merges
         except Exception as e:
             logger.exception(f"Failed to save known PDF URLs to GCS: {e}")
             # Consider admin notification
@@ -171,13 +253,9 @@ def save_known_urls(known_urls_dict: Dict[str, List[str]], config: Config):
         local_file_path = storage_path
         try:
             logger.info(f"Attempting to save known PDF URLs to local file: {local_file_path}")
-            dir_name = os.path.dirname(local_file_path)
-            if dir_name:
-                os.makedirs(dir_name, exist_ok=True)
-            json_data = json.dumps(sorted_dict, ensure_ascii=False, indent=2)
-            with open(local_file_path, 'w', encoding='utf-8') as f:
-                f.write(json_data)
-            logger.info(f"Saved known PDF URLs for {len(sorted_dict)} target URLs to local file: {local_file_path}")
+            json_data = _dumps_json(known_urls_dict)
+            _atomic_write(local_file_path, json_data)
+            logger.info(f"Saved known PDF URLs for {len(known_urls_dict)} target URLs to local file: {local_file_path}")
         except Exception as e:
             logger.exception(f"Failed to save known PDF URLs to local file {local_file_path}: {e}")
     else:
@@ -185,10 +263,125 @@ def save_known_urls(known_urls_dict: Dict[str, List[str]], config: Config):
         logger.error("Storage configuration invalid. Cannot save known URLs. Provide GCS bucket name or ensure local path is set without GCS bucket.")
 
 
+def _merge_known_urls(all_known_urls_dict: Dict[str, List[str]], target_url: str, current_pdf_urls: Set[str]) -> Tuple[Set[str], bool]:
+    """
+    Merges current PDF URLs for target_url into all_known_urls_dict (in place).
+    On the first run for a target the current URLs are recorded but not reported as new.
+
+    Returns:
+        Tuple[Set[str], bool]: (newly found PDF URLs to notify, whether the dict changed and must be saved).
+    """
+    known_list = all_known_urls_dict.get(target_url, [])
+    # difference() accepts the stored list directly: it discards each known URL from a copy
+    # of the current set, so no set of the (usually much larger) known list is built.
+    new_urls_for_target = current_pdf_urls.difference(known_list)
+
+    # Check if this target URL is new or if there are new PDFs for it
+    if target_url not in all_known_urls_dict and current_pdf_urls:
+        logger.info(f"'{target_url}' is a new target URL or has no previous known URLs. Saving current PDFs. No notification for these.")
+        all_known_urls_dict[target_url] = sorted(current_pdf_urls)
+        return set(), True # No "new" URLs to notify on first save for this target
+    if new_urls_for_target:
+        logger.info(f"Found {len(new_urls_for_target)} new PDF URLs for '{target_url}'.")
+        # Stored lists are saved sorted: appending the sorted new URLs leaves two sorted runs,
+        # which Timsort merges in linear time (vs. re-sorting the whole set from scratch).
+        merged = known_list + sorted(new_urls_for_target) # New list, so sorting in place can't touch the loaded one
+        merged.sort() # In place: avoids the extra copy sorted() would make
+        all_known_urls_dict[target_url] = merged
+        return new_urls_for_target, True
+    logger.info(f"No new PDF URLs found for '{target_url}'.")
+    return new_urls_for_target, False
+
+class KnownUrlsSession:
+    """
+    Batches known-URL updates for several target URLs into one load and at most one save.
+    The dict is loaded lazily on the first find_new_pdf_urls call (so a tick with no PDF
+    targets touches no storage), mutated in memory per target, and written back on exit
+    only if some target changed it.
+
+    With GCS the save is guarded by the generation that was loaded, so a write from another
+    instance in between is never clobbered: on a precondition failure the object is re-read,
+    this session's updates are merged on top of it, and the save is retried (up to max_attempts).
+
+    Usage:
+        with KnownUrlsSession(config) as session:
+            for target_url, current_pdf_urls in ...:
+                new_urls = session.find_new_pdf_urls(target_url, current_pdf_urls)
+    """
+
+    def __init__(self, config: Config, max_attempts: int = 3):
+        self.config = config
+        self.max_attempts = max_attempts
+        self.known_urls_dict: Optional[Dict[str, List[str]]] = None
+        self.generation: Optional[int] = None # GCS generation the dict was loaded at
+        self.dirty = False
+        self._updates: Dict[str, Set[str]] = {} # Merges to replay on top of a concurrent write
+
+    def __enter__(self) -> 'KnownUrlsSession':
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        # Save even if a later target raised: updates already merged for earlier targets are valid.
+        self.flush()
+
+    def find_new_pdf_urls(self, target_url: str, current_pdf_urls: Set[str]) -> Set[str]:
+        """
+        Session counterpart of the module-level find_new_pdf_urls: merges into the in-memory dict
+        instead of saving immediately.
+
+        Raises:
+            Exception: If loading the known URLs fails (fatal for this target, as before).
+        """
+        if self.known_urls_dict is None:
+            try:
+                self.known_urls_dict, self.generation = load_known_urls_with_generation(self.config)
+            except Exception as e: # Catch fatal load errors (like GCS connection issues)
+                logger.error(f"find_new_pdf_urls: Fatal error loading known URLs, cannot proceed for {target_url}: {e}")
+                # Re-raise the exception to signal failure to the caller (main.process_url)
+                raise e
+
+        new_urls_for_target, target_needs_update = _merge_known_urls(self.known_urls_dict, target_url, current_pdf_urls)
+        if target_needs_update:
+            self._updates.setdefault(target_url, set()).update(current_pdf_urls)
+            self.dirty = True
+        return new_urls_for_target
+
+    def flush(self) -> None:
+        """
+        Saves the dict if any target changed it, retrying on concurrent GCS writes.
+        Save errors are logged, not raised.
+        """
+        if not self.dirty or self.known_urls_dict is None: # dirty implies loaded; the check narrows the type
+            return
+        for attempt in range(1, self.max_attempts + 1):
+            try:
+                save_known_urls(self.known_urls_dict, self.config, if_generation_match=self.generation)
+                break
+            except PreconditionFailed:
+                logger.warning(f"Known URLs changed since they were read (attempt {attempt}/{self.max_attempts}); merging and retrying.")
+            except Exception as e:
+                logger.error(f"find_new_pdf_urls: Failed to save updated known URLs dictionary, but proceeding. Error: {e}")
+                break # Proceed: the new URLs have already been returned to the caller
+            if attempt == self.max_attempts:
+                logger.error(f"find_new_pdf_urls: Gave up saving known URLs after {self.max_attempts} concurrent updates.")
+                break
+            try:
+                self.known_urls_dict, self.generation = load_known_urls_with_generation(self.config)
+            except Exception as e:
+                logger.error(f"find_new_pdf_urls: Failed to re-read known URLs after a concurrent update, not saving. Error: {e}")
+                break
+            changed = [_merge_known_urls(self.known_urls_dict, target_url, current_pdf_urls)[1]
+                       for target_url, current_pdf_urls in self._updates.items()]
+            if not any(changed):
+                break # The concurrent write already recorded every update of this session
+        self.dirty = False
+        self._updates.clear()
+
 def find_new_pdf_urls(target_url: str, current_pdf_urls: Set[str], config: Config) -> Set[str]:
     """
     Compares current PDF URLs for a specific target URL with the known URLs from storage.
     Handles the first run scenario for the target URL and updates the known URLs dictionary.
+    Single-target shorthand for KnownUrlsSession (one load, and one save if anything changed).
 
     Args:
         target_url (str): The specific URL being checked.
@@ -198,44 +391,8 @@ def find_new_pdf_urls(target_url: str, current_pdf_urls: Set[str], config: Confi
     Returns:
         Set[str]: Set of newly found PDF URLs for the target_url.
     """
-    all_known_urls_dict: Dict[str, List[str]] = {}
-    new_urls_for_target: Set[str] = set()
-
-    try:
-        all_known_urls_dict = load_known_urls(config)
-    except Exception as e: # Catch fatal load errors (like GCS connection issues)
-        logger.error(f"find_new_pdf_urls: Fatal error loading known URLs, cannot proceed for {target_url}: {e}")
-        # Re-raise the exception to signal failure to the caller (main.process_url)
-        raise e
-
-    known_urls_for_target: Set[str] = set(all_known_urls_dict.get(target_url, []))
-
-    new_urls_for_target = current_pdf_urls - known_urls_for_target
-
-    # Check if this target URL is new or if there are new PDFs for it
-    target_needs_update = False
-    if target_url not in all_known_urls_dict and current_pdf_urls:
-        logger.info(f"'{target_url}' is a new target URL or has no previous known URLs. Saving current PDFs. No notification for these.")
-        all_known_urls_dict[target_url] = sorted(list(current_pdf_urls))
-        target_needs_update = True
-        new_urls_for_target = set() # No "new" URLs to notify on first save for this target
-    elif new_urls_for_target:
-        logger.info(f"Found {len(new_urls_for_target)} new PDF URLs for '{target_url}'.")
-        updated_known_for_target = known_urls_for_target.union(new_urls_for_target)
-        all_known_urls_dict[target_url] = sorted(list(updated_known_for_target))
-        target_needs_update = True
-    else:
-        logger.info(f"No new PDF URLs found for '{target_url}'.")
-
-    # Save the entire dictionary back if an update occurred
-    if target_needs_update:
-        try:
-            save_known_urls(all_known_urls_dict, config)
-        except Exception as e:
-            logger.error(f"find_new_pdf_urls: Failed to save updated known URLs dictionary after processing '{target_url}', but proceeding. Error: {e}")
-            # Proceed to return new_urls_for_target even if save failed
-
-    return new_urls_for_target
+    with KnownUrlsSession(config) as session:
+        return session.find_new_pdf_urls(target_url, current_pdf_urls)
 
 
 # --- Functions for Meeting ID State ---
@@ -258,14 +415,13 @@ def load_latest_meeting_ids(config: Config) -> Dict[str, str]:
 
     if config.gcs_bucket_name and storage_path:
         # Use GCS
-        client = _get_gcs_client()
-        bucket = client.bucket(config.gcs_bucket_name)
+        bucket = _get_bucket(config.gcs_bucket_name)
         blob = bucket.blob(storage_path)
 
         try:
             logger.info(f"Attempting to load latest meeting IDs from gs://{config.gcs_bucket_name}/{storage_path}")
-            json_data = blob.download_as_string()
-            loaded_data = json.loads(json_data)
+            json_data = blob.download_as_bytes()
+            loaded_data = _loads_json(json_data)
             if isinstance(loaded_data, dict):
                  # Validate structure: keys are strings, values are strings
                 valid_data = True
@@ -298,8 +454,8 @@ def load_latest_meeting_ids(config: Config) -> Dict[str, str]:
         local_file_path = storage_path
         try:
             logger.info(f"Attempting to load latest meeting IDs from local file: {local_file_path}")
-            with open(local_file_path, 'r', encoding='utf-8') as f:
-                loaded_data = json.load(f)
+            with open(local_file_path, 'rb') as f:
+                loaded_data = _loads_json(f.read())
                 if isinstance(loaded_data, dict):
                     # Validate structure
                     valid_data = True
@@ -347,15 +503,11 @@ def save_latest_meeting_ids(latest_ids_dict: Dict[str, str], config: Config):
 
     if use_gcs:
         # --- Use GCS ---
-        client = _get_gcs_client()
-        bucket = client.bucket(config.gcs_bucket_name)
+        bucket = _get_bucket(config.gcs_bucket_name)
         blob = bucket.blob(storage_path)
         try:
-            # Sort dictionary by key for consistent output (optional)
-            sorted_dict = dict(sorted(latest_ids_dict.items()))
-            json_data = json.dumps(sorted_dict, ensure_ascii=False, indent=2)
-            blob.upload_from_string(json_data, content_type='application/json')
-            logger.info(f"Saved latest meeting IDs for {len(sorted_dict)} target URLs to gs://{config.gcs_bucket_name}/{storage_path}")
+            _upload_json(blob, latest_ids_dict) # Keys are sorted by the encoder
+            logger.info(f"Saved latest meeting IDs for {len(latest_ids_dict)} target URLs to gs://{config.gcs_bucket_name}/{storage_path}")
         except Exception as e:
             logger.exception(f"Failed to save latest meeting IDs to GCS: {e}")
             # Consider admin notification
@@ -364,15 +516,9 @@ def save_latest_meeting_ids(latest_ids_dict: Dict[str, str], config: Config):
         local_file_path = storage_path
         try:
             logger.info(f"Attempting to save latest meeting IDs to local file: {local_file_path}")
-            dir_name = os.path.dirname(local_file_path)
-            if dir_name:
-                os.makedirs(dir_name, exist_ok=True)
-            # Sort dictionary by key for consistent output (optional)
-            sorted_dict = dict(sorted(latest_ids_dict.items()))
-            json_data = json.dumps(sorted_dict, ensure_ascii=False, indent=2)
-            with open(local_file_path, 'w', encoding='utf-8') as f:
-                f.write(json_data)
-            logger.info(f"Saved latest meeting IDs for {len(sorted_dict)} target URLs to local file: {local_file_path}")
+            json_data = _dumps_json(latest_ids_dict) # Keys are sorted by the encoder
+            _atomic_write(local_file_path, json_data)
+            logger.info(f"Saved latest meeting IDs for {len(latest_ids_dict)} target URLs to local file: {local_file_path}")
         except Exception as e:
             logger.exception(f"Failed to save latest meeting IDs to local file {local_file_path}: {e}")
     # If neither GCS nor local is configured/applicable, log an error.
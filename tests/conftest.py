@@ -1,6 +1,9 @@
 import pytest
+from bs4.builder import builder_registry
 from src.config import Config
 from src import parser # Import parser for function references
+from src import notifier
+from src import storage
 
 # Define constants used in the fixture
 PDF_URL = "https://www.hospital.or.jp/site/ministry/"
@@ -12,6 +15,22 @@ TEST_BUCKET_NAME = "test-bucket"
 TEST_KNOWN_URLS_FILE = "test_known.json"
 TEST_LATEST_IDS_FILE = "test_ids.json"
 
+@pytest.fixture(scope="session", autouse=True)
+def _require_lxml_builder():
+    """Fails the session loudly if BeautifulSoup cannot use the parser src.parser is pinned to (lxml)."""
+    assert builder_registry.lookup(parser.HTML_PARSER) is not None, (
+        f"BeautifulSoup tree builder '{parser.HTML_PARSER}' is unavailable; install lxml (see requirements.txt)"
+    )
+
+@pytest.fixture(autouse=True)
+def _clear_module_caches():
+    """Clears module-level lru_caches after each test so cached state never leaks between tests."""
+    yield
+    notifier._load_slack_config.cache_clear()
+    notifier._build_slack_client.cache_clear()
+    storage._get_gcs_client.cache_clear()
+    storage._get_bucket.cache_clear()
+
 @pytest.fixture
 def mock_app_config() -> Config:
     """Provides a mock Config object shared across test files."""
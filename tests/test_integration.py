@@ -1,7 +1,8 @@
 import pytest
 import json
+import threading
 from unittest.mock import MagicMock, patch, ANY
-from google.cloud.exceptions import NotFound
+from google.cloud.exceptions import NotFound, PreconditionFailed
 from typing import Dict, List, Any, Set # Import necessary types
 
 # Modules to test
@@ -67,6 +68,7 @@ PARSED_MEETING_OLD = {
 
 # Initial storage states
 INITIAL_KNOWN_URLS: Dict[str, List[str]] = {PDF_URL: [f'{PDF_URL}known.pdf']}
+INITIAL_KNOWN_URLS_GENERATION = 42 # GCS generation the known URLs are loaded at
 INITIAL_LATEST_IDS: Dict[str, str] = {MEETING_URL: '第606回'}
 
 # Expected states after successful run
@@ -105,11 +107,11 @@ def mock_parsers(mocker):
 @pytest.fixture
 def mock_storage_funcs(mocker):
     """Mocks all storage functions used in main."""
-    mock_load_known = mocker.patch('src.main.storage.load_known_urls')
+    mock_load_known = mocker.patch('src.main.storage.load_known_urls_with_generation')
     mock_save_known = mocker.patch('src.main.storage.save_known_urls')
     mock_load_ids = mocker.patch('src.main.storage.load_latest_meeting_ids')
     mock_save_ids = mocker.patch('src.main.storage.save_latest_meeting_ids')
-    # find_new_pdf_urls uses load/save internally, so we don't mock it directly
+    # The known-URLs session uses load/save internally, so we don't mock it directly
     # unless we want to test its specific return value in isolation.
     # For integration, we let it run using the mocked load/save.
     # mocker.patch('src.main.storage.find_new_pdf_urls') # Don't mock this for integration
@@ -137,7 +139,7 @@ def test_run_check_all_success(mock_fetcher, mock_parsers, mock_storage_funcs, m
     mock_fetcher.side_effect = lambda url, **kwargs: MOCK_HTML_PDF if url == PDF_URL else MOCK_HTML_MEETING if url == MEETING_URL else None
     mock_pdf_parser.return_value = PARSED_PDF_DOCS
     mock_meeting_parser.return_value = PARSED_MEETING_NEW
-    mock_load_known.return_value = INITIAL_KNOWN_URLS
+    mock_load_known.return_value = (INITIAL_KNOWN_URLS, INITIAL_KNOWN_URLS_GENERATION)
     mock_load_ids.return_value = INITIAL_LATEST_IDS
 
     # Run the main check function
@@ -151,7 +153,8 @@ def test_run_check_all_success(mock_fetcher, mock_parsers, mock_storage_funcs, m
     mock_load_known.assert_called_once_with(mock_app_config)
     mock_load_ids.assert_called_once_with(mock_app_config)
     # Check saves
-    mock_save_known.assert_called_once_with(EXPECTED_KNOWN_URLS_AFTER_PDF, mock_app_config)
+    # The save is guarded by the generation that was loaded
+    mock_save_known.assert_called_once_with(EXPECTED_KNOWN_URLS_AFTER_PDF, mock_app_config, if_generation_match=INITIAL_KNOWN_URLS_GENERATION)
     mock_save_ids.assert_called_once_with(EXPECTED_LATEST_IDS_AFTER_MEETING, mock_app_config)
     # Check notifications
     assert mock_notify.call_count == 2
@@ -172,7 +175,7 @@ def test_run_check_no_new_items(mock_fetcher, mock_parsers, mock_storage_funcs,
     # Meeting parser returns the old meeting ID
     mock_meeting_parser.return_value = PARSED_MEETING_OLD
     # Storage load returns the current state
-    mock_load_known.return_value = {PDF_URL: [f'{PDF_URL}known.pdf']}
+    mock_load_known.return_value = ({PDF_URL: [f'{PDF_URL}known.pdf']}, None)
     mock_load_ids.return_value = {MEETING_URL: '第606回'}
 
     result = main.run_check(mock_app_config)
@@ -198,7 +201,7 @@ def test_run_check_pdf_first_run_meeting_no_change(mock_fetcher, mock_parsers, m
     mock_fetcher.side_effect = lambda url, **kwargs: MOCK_HTML_PDF if url == PDF_URL else MOCK_HTML_MEETING_OLD if url == MEETING_URL else None
     mock_pdf_parser.return_value = PARSED_PDF_DOCS # Found docs for PDF URL
     mock_meeting_parser.return_value = PARSED_MEETING_OLD # Old meeting info
-    mock_load_known.return_value = {} # PDF file not found (first run)
+    mock_load_known.return_value = ({}, 0) # PDF state object not found (first run)
     mock_load_ids.return_value = {MEETING_URL: '第606回'} # Existing meeting ID
 
     result = main.run_check(mock_app_config)
@@ -210,7 +213,8 @@ def test_run_check_pdf_first_run_meeting_no_change(mock_fetcher, mock_parsers, m
     mock_load_known.assert_called_once()
     mock_load_ids.assert_called_once()
     # Save should be called for PDF URL with current docs
-    mock_save_known.assert_called_once_with({PDF_URL: sorted([d['url'] for d in PARSED_PDF_DOCS])}, mock_app_config)
+    # Generation 0: the object is only created if another run hasn't created it meanwhile
+    mock_save_known.assert_called_once_with({PDF_URL: sorted([d['url'] for d in PARSED_PDF_DOCS])}, mock_app_config, if_generation_match=0)
     mock_save_ids.assert_not_called() # No change for meeting ID
     mock_notify.assert_not_called() # No notification on first run for PDF
     mock_alert.assert_not_called()
@@ -225,7 +229,7 @@ def test_run_check_meeting_parser_returns_none(mock_fetcher, mock_parsers, mock_
     mock_fetcher.side_effect = lambda url, **kwargs: MOCK_HTML_PDF if url == PDF_URL else "<html></html>" # Empty HTML for meeting
     mock_pdf_parser.return_value = [] # No new PDFs
     mock_meeting_parser.return_value = None # Simulate parser finding nothing or erroring gracefully
-    mock_load_known.return_value = {PDF_URL: []}
+    mock_load_known.return_value = ({PDF_URL: []}, None)
     mock_load_ids.return_value = {MEETING_URL: 'ID_Prev'}
 
     result = main.run_check(mock_app_config)
@@ -243,6 +247,35 @@ def test_run_check_meeting_parser_returns_none(mock_fetcher, mock_parsers, mock_
     mock_alert.assert_not_called()
 
 
+def test_run_check_known_urls_concurrent_write(mock_fetcher, mock_parsers, mock_storage_funcs, mock_notifier, mock_app_config, mocker):
+    """Test run_check re-reads and merges when another run wrote the known URLs in between, instead of clobbering them."""
+    mock_pdf_parser, mock_meeting_parser = mock_parsers
+    mock_load_known, mock_save_known, mock_load_ids, mock_save_ids = mock_storage_funcs
+    mock_notify, mock_alert = mock_notifier
+    mocker.patch('src.storage.logger.warning')
+
+    mock_fetcher.side_effect = lambda url, **kwargs: MOCK_HTML_PDF if url == PDF_URL else MOCK_HTML_MEETING_OLD if url == MEETING_URL else None
+    mock_pdf_parser.return_value = PARSED_PDF_DOCS
+    mock_meeting_parser.return_value = PARSED_MEETING_OLD
+    concurrent_known_urls = {PDF_URL: [f'{PDF_URL}known.pdf', f'{PDF_URL}other.pdf']} # Written by another run
+    mock_load_known.side_effect = [
+        ({PDF_URL: [f'{PDF_URL}known.pdf']}, INITIAL_KNOWN_URLS_GENERATION),
+        (concurrent_known_urls, INITIAL_KNOWN_URLS_GENERATION + 1),
+    ]
+    mock_save_known.side_effect = [PreconditionFailed("generation mismatch"), None]
+    mock_load_ids.return_value = {MEETING_URL: '第606回'}
+
+    result = main.run_check(mock_app_config)
+
+    assert result is True
+    assert mock_save_known.call_args_list == [
+        mocker.call(EXPECTED_KNOWN_URLS_AFTER_PDF, mock_app_config, if_generation_match=INITIAL_KNOWN_URLS_GENERATION),
+        mocker.call({PDF_URL: [f'{PDF_URL}known.pdf', f'{PDF_URL}new.pdf', f'{PDF_URL}other.pdf']},
+                    mock_app_config, if_generation_match=INITIAL_KNOWN_URLS_GENERATION + 1),
+    ]
+    mock_notify.assert_called_once_with(EXPECTED_PDF_NOTIFY_PAYLOAD, mock_app_config) # Notified once, before the retry
+    mock_alert.assert_not_called()
+
 def test_run_check_fetch_failure_one_url(mock_fetcher, mock_parsers, mock_storage_funcs, mock_notifier, mock_app_config):
     """Test run_check handles fetch failure for one URL and continues."""
     mock_pdf_parser, mock_meeting_parser = mock_parsers
@@ -306,6 +339,30 @@ def test_run_check_parser_failure_one_url(mock_fetcher, mock_parsers, mock_stora
         config=mock_app_config
     )
 
+def test_run_check_fetches_urls_concurrently(mock_fetcher, mock_parsers, mock_storage_funcs, mock_notifier, mock_app_config):
+    """Test run_check overlaps the HTML fetches: each fetch waits for the other to start."""
+    mock_pdf_parser, mock_meeting_parser = mock_parsers
+    mock_load_known, mock_save_known, mock_load_ids, mock_save_ids = mock_storage_funcs
+    mock_notify, mock_alert = mock_notifier
+    both_started = threading.Barrier(2, timeout=5) # Serial fetches would break the barrier
+
+    def fetch_side_effect(url, **kwargs):
+        both_started.wait()
+        return MOCK_HTML_PDF if url == PDF_URL else MOCK_HTML_MEETING_OLD
+    mock_fetcher.side_effect = fetch_side_effect
+    mock_pdf_parser.return_value = [{'date': '2025.04.19', 'title': 'Known PDF', 'url': f'{PDF_URL}known.pdf'}]
+    mock_meeting_parser.return_value = PARSED_MEETING_OLD
+    mock_load_known.return_value = ({PDF_URL: [f'{PDF_URL}known.pdf']}, None)
+    mock_load_ids.return_value = {MEETING_URL: '第606回'}
+
+    result = main.run_check(mock_app_config)
+
+    assert result is True
+    assert mock_fetcher.call_count == 2
+    mock_pdf_parser.assert_called_once_with(MOCK_HTML_PDF, PDF_URL)
+    mock_meeting_parser.assert_called_once_with(MOCK_HTML_MEETING_OLD, MEETING_URL)
+    mock_alert.assert_not_called()
+
 def test_run_check_storage_load_error(mock_fetcher, mock_parsers, mock_storage_funcs, mock_notifier, mock_app_config):
     """Test run_check handles critical storage load error."""
     mock_pdf_parser, mock_meeting_parser = mock_parsers
@@ -1,7 +1,23 @@
+import time
+from operator import itemgetter
+from urllib.parse import urljoin
 import pytest
-from src.parser import extract_pdf_links, extract_hospital_document_info, extract_latest_chuikyo_meeting # Import the new function
+from bs4 import BeautifulSoup
+from src import parser
+from src.parser import _iter_pdf_links, _to_absolute_url, extract_pdf_links, extract_hospital_document_info, extract_latest_chuikyo_meeting # Import the new function
 from typing import List, Dict, Optional, Any # For type hinting expected results
 
+pytestmark = [pytest.mark.parser]
+
+def _raise_parse_error(*args, **kwargs):
+    """Stand-in for a parser entry point that always fails."""
+    raise Exception("Parsing failed unexpectedly")
+
+@pytest.fixture
+def broken_soup(monkeypatch):
+    """Makes every BeautifulSoup(...) call in src.parser raise."""
+    monkeypatch.setattr('src.parser.BeautifulSoup', _raise_parse_error)
+
 # --- Test Data ---
 
 BASE_URL = "http://example.com/path/"
@@ -38,7 +54,6 @@ EXPECTED_SIMPLE_REL_NO_SLASH = {
     "http://example.com/root.pdf"
 }
 
-
 HTML_MIXED = """
 <html><body>
 <a href="http://example.com/absolute.pdf">Absolute</a>
@@ -67,20 +82,16 @@ HTML_NO_PDF = """
 <a href="http://example.com/no_pdf_here">No PDF</a>
 </body></html>
 """
-EXPECTED_NO_PDF: set[str] = set()
 
-HTML_EMPTY = ""
-EXPECTED_EMPTY: set[str] = set()
+HTML_EMPTY = "" # Also used by the hospital/chuikyo tables
 
 HTML_NO_LINKS = """
 <html><body><p>No links here.</p></body></html>
 """
-EXPECTED_NO_LINKS: set[str] = set()
 
 HTML_LINK_NO_HREF = """
 <html><body><a>Link without href</a></body></html>
 """
-EXPECTED_LINK_NO_HREF: set[str] = set()
 
 HTML_MALFORMED = """
 <html><body>
@@ -89,7 +100,7 @@ HTML_MALFORMED = """
 <a href="good.pdf">Good Link</a>
 """
 # BeautifulSoup might not parse severely malformed hrefs
-EXPECTED_MALFORMED: set[str] = {
+EXPECTED_MALFORMED = {
     # "http://example.com/path/malformed1.pdf", # Likely ignored due to missing quote
     # "http://example.com/path/malformed2.pdf", # Likely ignored due to structure
     "http://example.com/path/good.pdf" # Only the valid link should be found
@@ -105,12 +116,13 @@ EXPECTED_MALFORMED: set[str] = {
         (HTML_SIMPLE_REL, BASE_URL, EXPECTED_SIMPLE_REL),
         (HTML_SIMPLE_REL, BASE_URL_NO_SLASH, EXPECTED_SIMPLE_REL_NO_SLASH), # Test base URL handling
         (HTML_MIXED, BASE_URL, EXPECTED_MIXED),
-        (HTML_NO_PDF, BASE_URL, EXPECTED_NO_PDF),
-        (HTML_EMPTY, BASE_URL, EXPECTED_EMPTY),
-        (HTML_NO_LINKS, BASE_URL, EXPECTED_NO_LINKS),
-        (HTML_LINK_NO_HREF, BASE_URL, EXPECTED_LINK_NO_HREF),
+        (HTML_NO_PDF, BASE_URL, set()),
+        (HTML_EMPTY, BASE_URL, set()),
+        (HTML_NO_LINKS, BASE_URL, set()),
+        (HTML_LINK_NO_HREF, BASE_URL, set()),
         (HTML_MALFORMED, BASE_URL, EXPECTED_MALFORMED),
     ],
+    ids=['simple_abs', 'simple_rel', 'simple_rel_noslash', 'mixed', 'no_pdf', 'empty', 'no_links', 'no_href', 'malformed'],
 )
 def test_extract_pdf_links(html_content, base_url, expected_links):
     """Test extract_pdf_links with various HTML inputs."""
@@ -123,13 +135,67 @@ def test_extract_pdf_links_empty_input():
     # Although base_url shouldn't be None, test defensive coding
     # assert extract_pdf_links(HTML_SIMPLE_REL, None) == set() # urljoin would likely fail here
 
-def test_extract_pdf_links_exception_handling(mocker):
+def test_extract_pdf_links_nested_anchor_without_href():
+    """Test an <a> without href nested inside an <a href> (kept by the strainer) doesn't discard the page's links."""
+    html_content = '<a href="x.pdf"><div><a>y</a></div></a><a href="b.pdf">b</a>'
+    assert extract_pdf_links(html_content, BASE_URL) == {
+        "http://example.com/path/x.pdf",
+        "http://example.com/path/b.pdf",
+    }
+
+def test_extract_pdf_links_exception_handling(broken_soup):
     """Test that extract_pdf_links returns an empty set on unexpected errors."""
-    # Mock BeautifulSoup to raise an exception
-    mocker.patch('src.parser.BeautifulSoup', side_effect=Exception("Parsing failed unexpectedly"))
     result = extract_pdf_links("<html></html>", "http://base.url")
     assert result == set()
 
+def test_iter_pdf_links_yields_unique_links_lazily_in_document_order():
+    """Test _iter_pdf_links is a lazy iterator yielding each absolute PDF URL once, in document order."""
+    links = _iter_pdf_links(HTML_MIXED, BASE_URL)
+
+    assert iter(links) is links
+    assert list(links) == [
+        "http://example.com/absolute.pdf",
+        "http://example.com/path/relative.pdf",
+        "http://example.com/root_rel.pdf",
+        "http://example.com/path/duplicate.pdf",
+        "http://example.com/path/case_test.PDF",
+        "http://example.com/path/with_query.pdf?id=123&type=report",
+    ]
+
+@pytest.mark.parametrize("base_url", [BASE_URL, "https://example.com/path/"], ids=['http_base', 'https_base'])
+@pytest.mark.parametrize(
+    "href",
+    ["https://example.com/a.pdf?", "https://example.com/a.pdf#", "https://example.com/a.pdf?#page=2", "http://example.com/a.pdf?"],
+    ids=['https_empty_query', 'https_empty_fragment', 'https_empty_query_with_fragment', 'http_empty_query'],
+)
+def test_to_absolute_url_absolute_href_with_empty_query_or_fragment(base_url, href):
+    """Test absolute hrefs with an empty '?' / '#' resolve exactly as urljoin does (it drops them for same-scheme bases)."""
+    assert _to_absolute_url(base_url, href) == urljoin(base_url, href)
+
+URLJOIN_BASES = [
+    BASE_URL,
+    BASE_URL_NO_SLASH,
+    "https://example.com/a/b/index.html?x=1#top", # Query/fragment on the base are ignored
+    "http://example.com", # No path
+    "http://example.com/a/./b/", # Base path that urljoin normalizes
+    "http://example.com/a;p/b/", # Params in the base path
+]
+URLJOIN_HREFS = [
+    "doc.pdf", "doc.pdf?", "doc.pdf#", "doc.pdf?#f", "doc.pdf?v=1", "doc.pdf;p",
+    "/root.pdf", "/root.pdf?",
+    "../up.pdf", "./here.pdf", "a/../b.pdf", "a//b.pdf", "%2e%2e/x.pdf",
+    "//cdn.example.org/x.pdf", "//cdn.example.org/x.pdf?",
+    "https://other.example/x.pdf", "http://example.com/x.pdf?", "https://example.com/x.pdf#",
+    "http://example.com/x.pdf;p", "http://u:p@example.com:8080/x.pdf", "http:x.pdf", "HTTP://EXAMPLE.com/x.pdf",
+    "?q.pdf", "#frag.pdf", "a b.pdf", "a\\b.pdf",
+]
+
+@pytest.mark.parametrize("base_url", URLJOIN_BASES)
+@pytest.mark.parametrize("href", URLJOIN_HREFS)
+def test_to_absolute_url_matches_urljoin(base_url, href):
+    """Test the urljoin shortcuts (_split_base_url / simple href patterns) give exactly urljoin's result."""
+    assert _to_absolute_url(base_url, href) == urljoin(base_url, href)
+
 # Remove the unrealistic test case for href as list
 # HTML_HREF_AS_LIST = """
 # <html><body>
@@ -150,7 +216,25 @@ def test_extract_pdf_links_exception_handling(mocker):
 #     assert result == expected_links
 
 
-# Consider adding tests for extremely large HTML if performance is a concern.
+# Large-HTML regression guard (opt-in: `pytest -m performance`).
+# The budget is deliberately pessimistic (about 2x a local run on 100k anchors, which bs4 tree building dominates);
+# it is meant to catch accidental O(N^2) behaviour, not to benchmark.
+LARGE_SCALE_ANCHORS = 100_000
+LARGE_SCALE_BUDGET_SECONDS = 10.0
+
+@pytest.mark.performance
+def test_extract_pdf_links_large_scale():
+    """Test extract_pdf_links handles a very large page within a wall-clock budget."""
+    anchors = '\n'.join(f'<a href="doc{i}.pdf">d{i}</a>' for i in range(LARGE_SCALE_ANCHORS))
+    html = f'<html><body>{anchors}</body></html>'
+
+    t0 = time.perf_counter()
+    result = extract_pdf_links(html, BASE_URL)
+    elapsed = time.perf_counter() - t0
+
+    assert len(result) == LARGE_SCALE_ANCHORS
+    assert elapsed < LARGE_SCALE_BUDGET_SECONDS, f"extract_pdf_links took {elapsed:.2f}s"
+
 # Consider adding tests for different encodings if that's relevant.
 
 
@@ -243,10 +327,18 @@ HTML_HOSPITAL_SITE_MALFORMED_DATE = """
 """
 EXPECTED_HOSPITAL_SITE_MALFORMED_DATE: List[Dict[str, str]] = [] # Should not be included if date format is wrong
 
+# lxml rejects str input carrying an encoding declaration; both parse paths must still accept such pages
+HTML_HOSPITAL_SITE_XML_DECLARATION = '<?xml version="1.0" encoding="UTF-8"?>' + HTML_HOSPITAL_SITE_VALID
+
 
 # --- Test Cases for extract_hospital_document_info ---
 
-@pytest.mark.parametrize(
+@pytest.fixture(scope="session")
+def expected_documents(request) -> List[Dict[str, str]]:
+    """Expected documents for a HOSPITAL_SITE_CASES row (indirect), sorted by URL once per session."""
+    return sorted(request.param, key=itemgetter('url'))
+
+HOSPITAL_SITE_CASES = pytest.mark.parametrize(
     "html_content, base_url, expected_documents",
     [
         (HTML_HOSPITAL_SITE_VALID, HOSPITAL_BASE_URL, EXPECTED_HOSPITAL_SITE_VALID),
@@ -256,19 +348,96 @@ EXPECTED_HOSPITAL_SITE_MALFORMED_DATE: List[Dict[str, str]] = [] # Should not be
         (HTML_HOSPITAL_SITE_NO_ITEMS, HOSPITAL_BASE_URL, EXPECTED_HOSPITAL_SITE_NO_ITEMS),
         (HTML_HOSPITAL_SITE_MALFORMED_DATE, HOSPITAL_BASE_URL, EXPECTED_HOSPITAL_SITE_MALFORMED_DATE),
         (HTML_EMPTY, HOSPITAL_BASE_URL, EXPECTED_HOSPITAL_SITE_NO_ITEMS), # Empty HTML should yield empty list
+        (HTML_HOSPITAL_SITE_XML_DECLARATION, HOSPITAL_BASE_URL, EXPECTED_HOSPITAL_SITE_VALID),
     ],
+    ids=['valid', 'missing_date', 'missing_title_link', 'not_pdf', 'no_items', 'malformed_date', 'empty', 'xml_declaration'],
+    indirect=['expected_documents'],
+    scope="session", # Groups both hospital tests by case so expected_documents is built once per case
 )
+
+@HOSPITAL_SITE_CASES
 def test_extract_hospital_document_info(html_content, base_url, expected_documents):
     """Test extract_hospital_document_info with various HTML structures."""
     result = extract_hospital_document_info(html_content, base_url)
-    # Sort both lists of dictionaries by URL for consistent comparison
-    result_sorted = sorted(result, key=lambda x: x['url'])
-    expected_sorted = sorted(expected_documents, key=lambda x: x['url'])
-    assert result_sorted == expected_sorted
+    # Sort by URL for consistent comparison (expected_documents is already sorted)
+    assert sorted(result, key=itemgetter('url')) == expected_documents
+
+@HOSPITAL_SITE_CASES
+def test_extract_hospital_document_info_streaming(monkeypatch, html_content, base_url, expected_documents):
+    """Test the streaming (large page) path yields the same documents as the tree path."""
+    monkeypatch.setattr('src.parser._STREAMING_THRESHOLD', 0) # Force streaming for small fixtures
+    result = extract_hospital_document_info(html_content, base_url)
+    assert sorted(result, key=itemgetter('url')) == expected_documents
 
-def test_extract_hospital_document_info_exception_handling(mocker):
+def test_extract_hospital_document_info_large_page_streams(monkeypatch):
+    """Test a page over the real _STREAMING_THRESHOLD (with an XML declaration) is parsed by the streaming path."""
+    monkeypatch.setattr('src.parser.lxml_html.fromstring', _raise_parse_error) # The tree path must not be used
+    padding = f"<!-- {'x' * parser._STREAMING_THRESHOLD} -->"
+    html_content = HTML_HOSPITAL_SITE_XML_DECLARATION.replace("<body>", "<body>" + padding, 1)
+    assert len(html_content) > parser._STREAMING_THRESHOLD
+
+    result = extract_hospital_document_info(html_content, HOSPITAL_BASE_URL)
+
+    assert sorted(result, key=itemgetter('url')) == sorted(EXPECTED_HOSPITAL_SITE_VALID, key=itemgetter('url'))
+
+HTML_HOSPITAL_SITE_ITEM_CLASS = """
+<html><body>
+<div class="{item_class}">
+  <div class="fs13">2025.04.19</div>
+  <div><p class="fs_p ic_140"><a href="doc.pdf">Doc</a></p></div>
+</div>
+</body></html>
+"""
+EXPECTED_HOSPITAL_SITE_ITEM_CLASS: List[Dict[str, str]] = [
+    {'date': '2025.04.19', 'title': 'Doc', 'url': f'{HOSPITAL_BASE_URL}doc.pdf'}
+]
+
+# Items are matched on the 'isotope-item' class token (as bs4's class_='isotope-item' did), whatever the whitespace
+HOSPITAL_ITEM_CLASS_CASES = pytest.mark.parametrize(
+    "item_class, expected",
+    [
+        ("col-12 isotope-item", EXPECTED_HOSPITAL_SITE_ITEM_CLASS),
+        ("col-12 isotope-item ", EXPECTED_HOSPITAL_SITE_ITEM_CLASS),
+        (" col-12 isotope-item", EXPECTED_HOSPITAL_SITE_ITEM_CLASS),
+        ("col-12  isotope-item", EXPECTED_HOSPITAL_SITE_ITEM_CLASS),
+        ("col-12\nisotope-item", EXPECTED_HOSPITAL_SITE_ITEM_CLASS),
+        ("isotope-item", EXPECTED_HOSPITAL_SITE_ITEM_CLASS),
+        ("col-12 isotope-items", []), # Substring of another class name: not an item
+    ],
+    ids=['exact', 'trailing_space', 'leading_space', 'double_space', 'newline', 'token_only', 'other_token'],
+)
+
+@HOSPITAL_ITEM_CLASS_CASES
+@pytest.mark.parametrize("streaming", [False, True], ids=['tree', 'streaming'])
+def test_extract_hospital_document_info_item_class_tokens(monkeypatch, streaming, item_class, expected):
+    """Test document items are found by class token, not by exact class attribute string, on both parse paths."""
+    if streaming:
+        monkeypatch.setattr('src.parser._STREAMING_THRESHOLD', 0)
+    html_content = HTML_HOSPITAL_SITE_ITEM_CLASS.format(item_class=item_class)
+    assert extract_hospital_document_info(html_content, HOSPITAL_BASE_URL) == expected
+
+HTML_HOSPITAL_SITE_NON_TEXT_ELEMENTS = """
+<html><body>
+<div class="col-12 isotope-item">
+  <div class="fs13">2025.04.<script>document.write("01");</script>19<style>.x{}</style></div>
+  <div><p class="fs_p ic_140"><a href="doc.pdf">通知<ruby>様式<rp>(</rp><rt>ようしき</rt><rp>)</rp></ruby>の改正<template>T</template></a></p></div>
+</div>
+</body></html>
+"""
+
+@pytest.mark.parametrize("streaming", [False, True], ids=['tree', 'streaming'])
+def test_extract_hospital_document_info_ignores_non_text_elements(monkeypatch, streaming):
+    """Test date/title text skips script/style/template/rt/rp contents, as bs4's get_text(strip=True) does."""
+    if streaming:
+        monkeypatch.setattr('src.parser._STREAMING_THRESHOLD', 0)
+    result = extract_hospital_document_info(HTML_HOSPITAL_SITE_NON_TEXT_ELEMENTS, HOSPITAL_BASE_URL)
+    soup = BeautifulSoup(HTML_HOSPITAL_SITE_NON_TEXT_ELEMENTS, 'lxml')
+    assert result == [{'date': '2025.04.19', 'title': soup.find('a').get_text(strip=True), 'url': f'{HOSPITAL_BASE_URL}doc.pdf'}]
+    assert result[0]['title'] == '通知様式の改正'
+
+def test_extract_hospital_document_info_exception_handling(monkeypatch):
     """Test that extract_hospital_document_info returns an empty list on unexpected errors."""
-    mocker.patch('src.parser.BeautifulSoup', side_effect=Exception("Parsing failed unexpectedly"))
+    monkeypatch.setattr('src.parser.lxml_html.fromstring', _raise_parse_error)
     result = extract_hospital_document_info("<html></html>", HOSPITAL_BASE_URL)
     assert result == []
 
@@ -515,14 +684,19 @@ EXPECTED_CHUIKYO_HEADER_IN_TBODY: Optional[Dict[str, Any]] = {
         (HTML_CHUIKYO_HEADER_IN_TBODY, CHUIKYO_BASE_URL, EXPECTED_CHUIKYO_HEADER_IN_TBODY), # Test header row in tbody (should now pass)
         (HTML_EMPTY, CHUIKYO_BASE_URL, None), # Empty HTML should return None
     ],
+    ids=[
+        'full', 'no_optional_links', 'topics_as_text', 'missing_table', 'missing_row', 'missing_id_td',
+        'missing_date_td', 'missing_topics_td', 'empty_topics_li', 'header_in_tbody', 'empty',
+    ],
 )
+@pytest.mark.chuikyo
 def test_extract_latest_chuikyo_meeting(html_content, base_url, expected_meeting_info):
     """Test extract_latest_chuikyo_meeting with various HTML structures."""
     result = extract_latest_chuikyo_meeting(html_content, base_url)
     assert result == expected_meeting_info
 
-def test_extract_latest_chuikyo_meeting_exception_handling(mocker):
+@pytest.mark.chuikyo
+def test_extract_latest_chuikyo_meeting_exception_handling(broken_soup):
     """Test that extract_latest_chuikyo_meeting returns None on unexpected errors."""
-    mocker.patch('src.parser.BeautifulSoup', side_effect=Exception("Parsing failed unexpectedly"))
     result = extract_latest_chuikyo_meeting("<html></html>", CHUIKYO_BASE_URL)
     assert result is None
@@ -1,33 +1,83 @@
+import dataclasses
+import gzip
+import io
 import json
+import logging
+import os
+import re
 import pytest
-from unittest.mock import patch, MagicMock
+from unittest.mock import MagicMock
 from google.cloud import storage as gcs # Use alias to avoid conflict
-from google.cloud.exceptions import NotFound
+from google.cloud.exceptions import NotFound, PreconditionFailed
 
 # Assuming src is importable
 from src import storage
 from src.config import Config # Import Config class
 from typing import Dict, List, Set # Import necessary types
 
+# Pure unit tests (GCS and the local filesystem are mocked). Patches are
+# function-scoped and session fixtures are either immutable or reset per test,
+# so no xdist_group is needed: cases can spread freely across `pytest -n auto` workers.
+pytestmark = [pytest.mark.unit, pytest.mark.storage]
+
 # --- Constants ---
 TEST_BUCKET_NAME = "test-medfeebot-bucket"
 TEST_KNOWN_URLS_FILE = "data/known_urls_v2.json" # New filename for PDF state
 TEST_LATEST_IDS_FILE = "data/latest_ids_v2.json" # New filename for meeting state
 TARGET_URL_PDF = "http://pdf.example.com"
 TARGET_URL_MEETING = "http://meeting.example.com"
+GCS_NOT_FOUND = NotFound("Object not found") # Shared: tests only check that NotFound is handled
+RE_GCS_API_ERROR = re.compile(r"GCS API error") # pytest.raises(match=...) accepts compiled patterns
+RE_GCS_LOAD_FAILED = re.compile(r"GCS Load Failed")
+
+def _json_payload(data) -> bytes:
+    """The exact bytes src.storage uploads/writes for data (2-space indent, keys sorted, UTF-8, non-ASCII kept)."""
+    return json.dumps(data, ensure_ascii=False, indent=2, sort_keys=True).encode('utf-8')
+
+def _error_messages(caplog):
+    """Messages of the ERROR (and logger.exception) records src.storage emitted."""
+    return [r.getMessage() for r in caplog.records if r.name == "src.storage" and r.levelno >= logging.ERROR]
+
+def _uploaded(mock_blob):
+    """Decodes the single upload_from_string call into (parsed JSON payload, kwargs).
+
+    Also checks the payload was sent gzip-compressed with Content-Encoding: gzip.
+    """
+    (args, kwargs), = [(c.args, c.kwargs) for c in mock_blob.upload_from_string.call_args_list]
+    assert mock_blob.content_encoding == 'gzip'
+    return json.loads(gzip.decompress(args[0])), kwargs
+
+# Inputs and expected (parsed) upload payloads for the save_* tests; the exact
+# byte format is pinned once by test_json_codec_matches_stdlib_format.
+KNOWN_URLS_TO_SAVE: Dict[str, List[str]] = { # Lists are kept sorted by the merge, and saved as-is
+    TARGET_URL_PDF: ["http://a.pdf", "http://c.pdf"],
+    "http://another.example.com": ["http://d.pdf"]
+}
+MEETING_IDS_TO_SAVE: Dict[str, str] = {
+    TARGET_URL_MEETING: "ID_789",
+    "http://other.meeting": "ID_101"
+}
 
 # --- Fixtures ---
 
+@pytest.fixture(scope="session")
+def _gcs_mock_templates():
+    """Builds the spec'd GCS Client/Bucket/Blob mocks once per session (spec introspection is the expensive part)."""
+    return MagicMock(spec=gcs.Client), MagicMock(spec=gcs.Bucket), MagicMock(spec=gcs.Blob)
+
 @pytest.fixture
-def mock_gcs_client(mocker):
+def mock_gcs_client(mocker, _gcs_mock_templates):
     """Mocks the google.cloud.storage Client and its methods."""
-    mock_client = MagicMock(spec=gcs.Client)
-    mock_bucket = MagicMock(spec=gcs.Bucket)
-    mock_blob = MagicMock(spec=gcs.Blob)
+    mock_client, mock_bucket, mock_blob = _gcs_mock_templates
+    for mock in _gcs_mock_templates:
+        mock.reset_mock(return_value=True, side_effect=True) # Clear calls/side effects from previous tests
+    # Plain attributes set by src.storage or by tests (_serve_downloads); not cleared by reset_mock
+    mock_blob.content_encoding = None
+    mock_blob.generation = None
+    storage._get_bucket.cache_clear() # Don't hand out a Bucket handle cached by an earlier test
 
     # Configure the mocks to return each other
-    # mocker.patch('src.storage.storage.Client', return_value=mock_client) # Patch the internal getter instead
-    mocker.patch('src.storage._get_gcs_client', return_value=mock_client) # Patch the getter function
+    mocker.patch.object(storage, '_get_gcs_client', return_value=mock_client) # Patch the getter function
     mock_client.bucket.return_value = mock_bucket
     mock_bucket.blob.return_value = mock_blob
 
@@ -35,8 +85,27 @@ def mock_gcs_client(mocker):
     return mock_client, mock_bucket, mock_blob
 
 @pytest.fixture
+def fake_local_fs(monkeypatch) -> Dict[str, bytes]:
+    """Routes src.storage's local-file branch to an in-memory dict (path -> bytes).
+
+    Tests that exercise the local path never touch the disk, and are unaffected
+    by stray state files left in the working directory.
+    """
+    files: Dict[str, bytes] = {}
+
+    def fake_open(path, mode='rb'):
+        if path not in files:
+            raise FileNotFoundError(path)
+        return io.BytesIO(files[path])
+
+    # Reads shadow the builtin only inside src.storage; writes all go through _atomic_write.
+    monkeypatch.setattr(storage, "open", fake_open, raising=False)
+    monkeypatch.setattr(storage, "_atomic_write", files.__setitem__)
+    return files
+
+@pytest.fixture(scope="session")
 def test_config() -> Config:
-    """Provides a Config object for tests."""
+    """Provides a Config object for tests (frozen and never mutated, so built once per session)."""
     # Create a config instance with the new attributes
     # Note: target_urls and url_configs are not strictly needed for storage tests,
     # but we include dummy values for completeness.
@@ -58,160 +127,202 @@ def test_config() -> Config:
         request_retry_delay=1
     )
 
+def test_gcs_client_and_bucket_handles_are_reused(mocker):
+    """Test the GCS client is built once and bucket handles are cached per bucket name."""
+    mock_client_cls = mocker.patch.object(storage.storage, 'Client')
+
+    first = storage._get_bucket(TEST_BUCKET_NAME)
+    second = storage._get_bucket(TEST_BUCKET_NAME)
+    storage._get_bucket("other-bucket")
+
+    assert first is second
+    mock_client_cls.assert_called_once_with()
+    assert mock_client_cls.return_value.bucket.call_args_list == [
+        mocker.call(TEST_BUCKET_NAME), mocker.call("other-bucket")
+    ]
+
 # --- Test Cases for load_known_urls ---
 
 def test_load_known_urls_gcs_not_found(mock_gcs_client, test_config):
     """Test load_known_urls when the GCS object does not exist."""
     mock_client, mock_bucket, mock_blob = mock_gcs_client
-    mock_blob.download_as_string.side_effect = NotFound("Object not found")
+    mock_blob.download_as_bytes.side_effect = GCS_NOT_FOUND
 
     known_urls_dict = storage.load_known_urls(test_config)
 
     assert known_urls_dict == {} # Should return empty dict
     mock_client.bucket.assert_called_once_with(TEST_BUCKET_NAME)
     mock_bucket.blob.assert_called_once_with(TEST_KNOWN_URLS_FILE) # Check correct filename
-    mock_blob.download_as_string.assert_called_once()
+    mock_blob.download_as_bytes.assert_called_once()
 
 def test_load_known_urls_success(mock_gcs_client, test_config):
     """Test load_known_urls with a valid JSON dictionary from GCS."""
     mock_client, mock_bucket, mock_blob = mock_gcs_client
-    urls_dict = {
-        TARGET_URL_PDF: ["http://a.pdf", "http://b.pdf"],
-        "http://another.example.com": ["http://c.pdf"]
-    }
-    mock_blob.download_as_string.return_value = json.dumps(urls_dict).encode('utf-8')
-    mock_blob.download_as_string.side_effect = None
+    mock_blob.download_as_bytes.return_value = (
+        b'{"http://pdf.example.com": ["http://a.pdf", "http://b.pdf"], '
+        b'"http://another.example.com": ["http://c.pdf"]}'
+    )
+    mock_blob.download_as_bytes.side_effect = None
 
     known_urls_dict = storage.load_known_urls(test_config)
 
-    assert known_urls_dict == urls_dict
-    mock_blob.download_as_string.assert_called_once()
+    assert known_urls_dict == {
+        TARGET_URL_PDF: ["http://a.pdf", "http://b.pdf"],
+        "http://another.example.com": ["http://c.pdf"]
+    }
+    mock_blob.download_as_bytes.assert_called_once()
 
 def test_load_known_urls_empty_json_dict(mock_gcs_client, test_config):
     """Test load_known_urls with an empty JSON dictionary from GCS."""
     mock_client, mock_bucket, mock_blob = mock_gcs_client
-    mock_blob.download_as_string.return_value = json.dumps({}).encode('utf-8')
-    mock_blob.download_as_string.side_effect = None
+    mock_blob.download_as_bytes.return_value = b'{}'
+    mock_blob.download_as_bytes.side_effect = None
 
     known_urls_dict = storage.load_known_urls(test_config)
 
     assert known_urls_dict == {}
-    mock_blob.download_as_string.assert_called_once()
-
-def test_load_known_urls_invalid_json(mock_gcs_client, test_config, mocker):
-    """Test load_known_urls with invalid JSON content (returns empty dict, logs error)."""
+    mock_blob.download_as_bytes.assert_called_once()
+
+@pytest.mark.parametrize(
+    "load_fn, payload, single_error",
+    [
+        (storage.load_known_urls, b"{invalid json", True),
+        (storage.load_known_urls, b'["a", "b"]', True), # JSON list, not dict
+        (storage.load_known_urls, # Value for TARGET_URL_PDF should be a list
+         b'{"http://pdf.example.com": "not_a_list", "http://another.example.com": ["valid.pdf"]}', True),
+        (storage.load_latest_meeting_ids, b"invalid json}", True),
+        (storage.load_latest_meeting_ids, b'["id1", "id2"]', True), # JSON list, not dict
+        (storage.load_latest_meeting_ids, b'{"http://meeting.example.com": ["not_a_string"]}', False), # Value should be string
+    ],
+    ids=['known_urls-invalid_json', 'known_urls-not_a_dict', 'known_urls-invalid_structure',
+         'meeting_ids-invalid_json', 'meeting_ids-not_a_dict', 'meeting_ids-invalid_structure'],
+)
+def test_load_invalid_payload(mock_gcs_client, test_config, caplog, load_fn, payload, single_error):
+    """Test load_* with invalid JSON / non-dict / wrongly shaped content (returns empty dict, logs error)."""
     mock_client, mock_bucket, mock_blob = mock_gcs_client
-    mock_logger_error = mocker.patch('src.storage.logger.error')
-    mock_blob.download_as_string.return_value = b"{invalid json"
-    mock_blob.download_as_string.side_effect = None
+    caplog.set_level(logging.ERROR, logger="src.storage")
+    mock_blob.download_as_bytes.return_value = payload
+    mock_blob.download_as_bytes.side_effect = None
 
     # Should not raise, should return empty dict
-    known_urls_dict = storage.load_known_urls(test_config)
+    loaded = load_fn(test_config)
 
-    assert known_urls_dict == {}
-    mock_blob.download_as_string.assert_called_once()
-    mock_logger_error.assert_called_once() # Check error was logged
+    assert loaded == {}
+    mock_blob.download_as_bytes.assert_called_once()
+    errors = _error_messages(caplog)
+    assert errors # Error should be logged
+    if single_error:
+        assert len(errors) == 1, errors
 
-def test_load_known_urls_not_a_dict(mock_gcs_client, test_config, mocker):
-    """Test load_known_urls when GCS JSON content is not a dict (returns empty dict, logs error)."""
+def test_load_known_urls_gcs_download_error(mock_gcs_client, test_config):
+    """Test load_known_urls handles critical GCS download errors (raises)."""
     mock_client, mock_bucket, mock_blob = mock_gcs_client
-    mock_logger_error = mocker.patch('src.storage.logger.error')
-    mock_blob.download_as_string.return_value = json.dumps(["a", "b"]).encode('utf-8') # JSON list, not dict
-    mock_blob.download_as_string.side_effect = None
+    mock_blob.download_as_bytes.side_effect = Exception("GCS API error")
 
-    # Should not raise, should return empty dict
-    known_urls_dict = storage.load_known_urls(test_config)
+    with pytest.raises(Exception, match=RE_GCS_API_ERROR):
+        storage.load_known_urls(test_config)
+    mock_blob.download_as_bytes.assert_called_once()
 
+def test_load_known_urls_missing_config(mock_app_config, fake_local_fs): # Use the correct fixture name
+    """Test load_known_urls returns empty dict if config is missing GCS bucket."""
+    config_no_gcs = dataclasses.replace(mock_app_config, gcs_bucket_name=None)
+    known_urls_dict = storage.load_known_urls(config_no_gcs) # Pass the modified config
     assert known_urls_dict == {}
-    mock_blob.download_as_string.assert_called_once()
-    mock_logger_error.assert_called_once()
 
-def test_load_known_urls_invalid_structure(mock_gcs_client, test_config, mocker):
-    """Test load_known_urls with incorrect dict structure (returns empty dict, logs error)."""
-    mock_client, mock_bucket, mock_blob = mock_gcs_client
-    mock_logger_error = mocker.patch('src.storage.logger.error')
-    invalid_dict = {
-        TARGET_URL_PDF: "not_a_list", # Value should be a list
-        "http://another.example.com": ["valid.pdf"]
-    }
-    mock_blob.download_as_string.return_value = json.dumps(invalid_dict).encode('utf-8')
-    mock_blob.download_as_string.side_effect = None
+def test_known_urls_local_file_round_trip(test_config, fake_local_fs):
+    """Test save/load_known_urls round-trip through the local-file branch (in memory)."""
+    local_config = dataclasses.replace(test_config, gcs_bucket_name=None)
 
-    # Should not raise, should return empty dict
-    known_urls_dict = storage.load_known_urls(test_config)
+    storage.save_known_urls({TARGET_URL_PDF: ["http://a.pdf", "http://b.pdf"]}, local_config)
 
-    assert known_urls_dict == {} # Invalid structure leads to empty dict
-    mock_blob.download_as_string.assert_called_once()
-    mock_logger_error.assert_called() # Error should be logged
+    assert json.loads(fake_local_fs[TEST_KNOWN_URLS_FILE]) == {TARGET_URL_PDF: ["http://a.pdf", "http://b.pdf"]}
+    assert storage.load_known_urls(local_config) == {TARGET_URL_PDF: ["http://a.pdf", "http://b.pdf"]}
 
-def test_load_known_urls_gcs_download_error(mock_gcs_client, test_config):
-    """Test load_known_urls handles critical GCS download errors (raises)."""
-    mock_client, mock_bucket, mock_blob = mock_gcs_client
-    mock_blob.download_as_string.side_effect = Exception("GCS API error")
+def test_save_known_urls_local_write_error(test_config, mocker, caplog):
+    """Test save_known_urls logs (doesn't raise) when the local atomic write fails."""
+    local_config = dataclasses.replace(test_config, gcs_bucket_name=None)
+    mock_write = mocker.patch.object(storage, '_atomic_write', side_effect=OSError("disk full"))
+    caplog.set_level(logging.ERROR, logger="src.storage")
 
-    with pytest.raises(Exception, match="GCS API error"):
-        storage.load_known_urls(test_config)
-    mock_blob.download_as_string.assert_called_once()
+    storage.save_known_urls({TARGET_URL_PDF: ["http://a.pdf"]}, local_config)
 
-def test_load_known_urls_missing_config(mock_app_config): # Use the correct fixture name
-    """Test load_known_urls returns empty dict if config is missing GCS bucket."""
-    # Create a new config instance with gcs_bucket_name=None
-    config_no_gcs = Config(
-        target_urls=mock_app_config.target_urls,
-        url_configs=mock_app_config.url_configs,
-        slack_api_token=mock_app_config.slack_api_token,
-        slack_channel_id=mock_app_config.slack_channel_id,
-        known_urls_file=mock_app_config.known_urls_file,
-        latest_ids_file=mock_app_config.latest_ids_file,
-        log_level=mock_app_config.log_level,
-        admin_slack_channel_id=mock_app_config.admin_slack_channel_id,
-        gcs_bucket_name=None # Set to None for this test
-    )
-    known_urls_dict = storage.load_known_urls(config_no_gcs) # Pass the modified config
-    assert known_urls_dict == {}
+    mock_write.assert_called_once()
+    assert len(_error_messages(caplog)) == 1
+
+@pytest.mark.parametrize("use_orjson", [True, False], ids=['orjson', 'stdlib_json'])
+def test_json_codec_matches_stdlib_format(monkeypatch, use_orjson):
+    """Test _dumps_json/_loads_json give the stdlib json format with or without orjson installed."""
+    if not use_orjson:
+        monkeypatch.setattr(storage, "orjson", None)
+    elif storage.orjson is None:
+        pytest.skip("orjson not installed")
+    data = {TARGET_URL_PDF: ["http://a.pdf", "http://日本語.pdf"], "http://empty": []} # Keys deliberately unsorted
+
+    encoded = storage._dumps_json(data)
+
+    assert encoded == _json_payload(data)
+    assert storage._loads_json(encoded) == data
+    assert storage._loads_json(gzip.compress(encoded)) == data # Raw (non-transcoded) GCS download
+    with pytest.raises(json.JSONDecodeError):
+        storage._loads_json(b"{invalid json")
+
+def test_atomic_write_replaces_target_without_leftovers(tmp_path):
+    """Test _atomic_write creates parent dirs, replaces existing content, and leaves no temp file."""
+    target = tmp_path / "nested" / "state.json"
+
+    storage._atomic_write(str(target), b"old")
+    storage._atomic_write(str(target), "新しい".encode('utf-8'))
+
+    assert target.read_text(encoding='utf-8') == "新しい"
+    assert [p.name for p in target.parent.iterdir()] == ["state.json"]
+
+def test_atomic_write_uses_unique_temp_files(tmp_path, mocker):
+    """Test each write gets its own temp file next to the target, so concurrent writers can't clobber one."""
+    target = tmp_path / "state.json"
+    mock_replace = mocker.patch.object(storage.os, 'replace')
+
+    storage._atomic_write(str(target), b"first")
+    storage._atomic_write(str(target), b"second")
+
+    (first_tmp, _), (second_tmp, _) = [c.args for c in mock_replace.call_args_list]
+    assert first_tmp != second_tmp
+    assert {os.path.dirname(first_tmp), os.path.dirname(second_tmp)} == {str(tmp_path)}
+    assert [open(first_tmp, 'rb').read(), open(second_tmp, 'rb').read()] == [b"first", b"second"]
+
+def test_atomic_write_failure_removes_temp_file(tmp_path, mocker):
+    """Test a failed replace leaves neither a temp file nor a target behind."""
+    target = tmp_path / "state.json"
+    mocker.patch.object(storage.os, 'replace', side_effect=OSError("rename failed"))
+
+    with pytest.raises(OSError):
+        storage._atomic_write(str(target), b"data")
+
+    assert list(tmp_path.iterdir()) == []
 
 # --- Test Cases for save_known_urls ---
 
 def test_save_known_urls_success(mock_gcs_client, test_config):
     """Test save_known_urls successfully saves a dictionary to GCS."""
     mock_client, mock_bucket, mock_blob = mock_gcs_client
-    urls_dict_to_save: Dict[str, List[str]] = {
-        TARGET_URL_PDF: ["http://c.pdf", "http://a.pdf"],
-        "http://another.example.com": ["http://d.pdf"]
-    }
-    # Expected JSON should have sorted lists inside
-    expected_dict_sorted = {
-        TARGET_URL_PDF: ["http://a.pdf", "http://c.pdf"],
-        "http://another.example.com": ["http://d.pdf"]
-    }
-    expected_json_string = json.dumps(expected_dict_sorted, ensure_ascii=False, indent=2)
 
-    storage.save_known_urls(urls_dict_to_save, test_config)
+    storage.save_known_urls(KNOWN_URLS_TO_SAVE, test_config)
 
     mock_client.bucket.assert_called_once_with(TEST_BUCKET_NAME)
     mock_bucket.blob.assert_called_once_with(TEST_KNOWN_URLS_FILE) # Check correct filename
-    mock_blob.upload_from_string.assert_called_once_with(
-        expected_json_string,
-        content_type='application/json'
-    )
+    assert _uploaded(mock_blob) == (KNOWN_URLS_TO_SAVE, {'content_type': 'application/json'})
 
 def test_save_known_urls_empty_dict(mock_gcs_client, test_config):
     """Test save_known_urls with an empty dictionary."""
     mock_client, mock_bucket, mock_blob = mock_gcs_client
-    urls_dict_to_save: Dict[str, List[str]] = {}
-    expected_json_string = json.dumps({}, ensure_ascii=False, indent=2)
 
-    storage.save_known_urls(urls_dict_to_save, test_config)
+    storage.save_known_urls({}, test_config)
 
-    mock_blob.upload_from_string.assert_called_once_with(
-        expected_json_string,
-        content_type='application/json'
-    )
+    assert _uploaded(mock_blob) == ({}, {'content_type': 'application/json'})
 
-def test_save_known_urls_gcs_upload_error(mock_gcs_client, test_config, mocker):
+def test_save_known_urls_gcs_upload_error(mock_gcs_client, test_config, caplog):
     """Test save_known_urls handles GCS upload errors (logs but doesn't raise)."""
     mock_client, mock_bucket, mock_blob = mock_gcs_client
-    mock_logger_exception = mocker.patch('src.storage.logger.exception')
+    caplog.set_level(logging.ERROR, logger="src.storage")
     urls_dict_to_save = {TARGET_URL_PDF: ["http://error.pdf"]}
     mock_blob.upload_from_string.side_effect = Exception("GCS upload failed")
 
@@ -219,27 +330,16 @@ def test_save_known_urls_gcs_upload_error(mock_gcs_client, test_config, mocker):
     storage.save_known_urls(urls_dict_to_save, test_config)
 
     mock_blob.upload_from_string.assert_called_once()
-    mock_logger_exception.assert_called_once()
+    assert len(_error_messages(caplog)) == 1
 
-def test_save_known_urls_missing_config(mock_app_config, mocker): # Use the correct fixture name
+def test_save_known_urls_missing_config(mock_app_config, caplog): # Use the correct fixture name
     """Test save_known_urls logs error if config is missing GCS bucket."""
-    mock_logger_error = mocker.patch('src.storage.logger.error')
-    # Create a new config instance with gcs_bucket_name=None
-    config_no_gcs = Config(
-        target_urls=mock_app_config.target_urls,
-        url_configs=mock_app_config.url_configs,
-        slack_api_token=mock_app_config.slack_api_token,
-        slack_channel_id=mock_app_config.slack_channel_id,
-        known_urls_file=None, # Set storage path to None as well
-        latest_ids_file=mock_app_config.latest_ids_file,
-        log_level=mock_app_config.log_level,
-        admin_slack_channel_id=mock_app_config.admin_slack_channel_id,
-        gcs_bucket_name=None # Set to None for this test
-    )
+    caplog.set_level(logging.ERROR, logger="src.storage")
+    config_no_gcs = dataclasses.replace(mock_app_config, gcs_bucket_name=None, known_urls_file=None) # Storage path missing as well
     # When GCS bucket is None, and storage_path (local path) is None (default), it should log error
     storage.save_known_urls({}, config_no_gcs) # Pass the modified config
     # Expect the "invalid configuration" message when both GCS bucket and path are missing
-    mock_logger_error.assert_called_with("Storage configuration invalid. Cannot save known URLs. Provide GCS bucket name or ensure local path is set without GCS bucket.")
+    assert _error_messages(caplog)[-1] == "Storage configuration invalid. Cannot save known URLs. Provide GCS bucket name or ensure local path is set without GCS bucket."
 
 # Test case where GCS is None but local path IS configured (should still log error as GCS takes precedence if bucket name was expected)
 # This behavior might need refinement based on desired logic (e.g., fallback to local if GCS fails?)
@@ -249,114 +349,75 @@ def test_save_known_urls_missing_config(mock_app_config, mocker): # Use the corr
 
 # --- Test Cases for find_new_pdf_urls ---
 
-@patch('src.storage.load_known_urls')
-@patch('src.storage.save_known_urls')
-def test_find_new_pdf_urls_first_run_for_target(mock_save, mock_load, test_config):
-    """Test find_new_pdf_urls when the target URL is seen for the first time."""
-    mock_load.return_value = {} # No known URLs initially
-    current_urls = {"http://first.pdf", "http://second.pdf"}
-    target_url = TARGET_URL_PDF
-
-    new_urls = storage.find_new_pdf_urls(target_url, current_urls, test_config)
-
-    assert new_urls == set() # No new URLs reported on first run for a target
-    mock_load.assert_called_once_with(test_config)
-    # Check save was called with the new target URL added
-    expected_saved_dict = {target_url: sorted(list(current_urls))}
-    mock_save.assert_called_once_with(expected_saved_dict, test_config)
-
-@patch('src.storage.load_known_urls')
-@patch('src.storage.save_known_urls')
-def test_find_new_pdf_urls_no_new(mock_save, mock_load, test_config):
-    """Test find_new_pdf_urls when there are no new URLs for the target."""
-    initial_dict = {TARGET_URL_PDF: ["http://a.pdf", "http://b.pdf"]}
-    mock_load.return_value = initial_dict
-    current_urls = {"http://b.pdf", "http://a.pdf"} # Same URLs
-    target_url = TARGET_URL_PDF
-
-    new_urls = storage.find_new_pdf_urls(target_url, current_urls, test_config)
-
-    assert new_urls == set()
-    mock_load.assert_called_once_with(test_config)
-    mock_save.assert_not_called()
-
-@patch('src.storage.load_known_urls')
-@patch('src.storage.save_known_urls')
-def test_find_new_pdf_urls_with_new(mock_save, mock_load, test_config):
-    """Test find_new_pdf_urls when new URLs are found for the target."""
-    initial_dict = {
-        TARGET_URL_PDF: ["http://a.pdf", "http://b.pdf"],
-        "http://other.url": ["http://x.pdf"]
-    }
-    mock_load.return_value = initial_dict
-    current_urls = {"http://b.pdf", "http://c.pdf", "http://d.pdf"}
-    target_url = TARGET_URL_PDF
-    expected_new = {"http://c.pdf", "http://d.pdf"}
-    expected_saved_dict = {
-        TARGET_URL_PDF: sorted(["http://a.pdf", "http://b.pdf", "http://c.pdf", "http://d.pdf"]),
-        "http://other.url": ["http://x.pdf"]
-    }
-
-    new_urls = storage.find_new_pdf_urls(target_url, current_urls, test_config)
+@pytest.fixture
+def seeded_known_urls(request, mocker):
+    """Patches load_known_urls_with_generation/save_known_urls so load returns a fresh copy of the
+    stored dict given by request.param, at SEED_GENERATION.
+
+    Use with indirect=True. Returns (mock_save, mock_load).
+    """
+    stored = {url: list(pdfs) for url, pdfs in request.param.items()}
+    mock_load = mocker.patch.object(storage, 'load_known_urls_with_generation', return_value=(stored, SEED_GENERATION))
+    mock_save = mocker.patch.object(storage, 'save_known_urls')
+    return mock_save, mock_load
+
+SEED_GENERATION = 5
+SEED_AB = {TARGET_URL_PDF: ("http://a.pdf", "http://b.pdf")}
+SEED_ABC = {TARGET_URL_PDF: ("http://a.pdf", "http://b.pdf", "http://c.pdf")}
+
+@pytest.mark.parametrize(
+    "seeded_known_urls, current_urls, expected_new, expected_saved",
+    [
+        # First run for the target: current URLs are stored, nothing is reported as new
+        ({}, {"http://first.pdf", "http://second.pdf"}, set(),
+         {TARGET_URL_PDF: ["http://first.pdf", "http://second.pdf"]}),
+        (SEED_AB, {"http://b.pdf", "http://a.pdf"}, set(), None), # Same URLs
+        ({**SEED_AB, "http://other.url": ("http://x.pdf",)}, {"http://b.pdf", "http://c.pdf", "http://d.pdf"},
+         {"http://c.pdf", "http://d.pdf"},
+         {TARGET_URL_PDF: ["http://a.pdf", "http://b.pdf", "http://c.pdf", "http://d.pdf"], "http://other.url": ["http://x.pdf"]}),
+        (SEED_ABC, {"http://b.pdf", "http://a.pdf"}, set(), None), # Current URLs are a subset
+        (SEED_AB, set(), set(), None), # Current URL set is empty
+    ],
+    ids=['first_run_for_target', 'no_new', 'with_new', 'current_is_subset', 'empty_current'],
+    indirect=['seeded_known_urls'],
+)
+def test_find_new_pdf_urls(seeded_known_urls, current_urls, expected_new, expected_saved, test_config):
+    """Test find_new_pdf_urls reports only unseen URLs and saves the merged dict only when it changed."""
+    mock_save, mock_load = seeded_known_urls
+
+    new_urls = storage.find_new_pdf_urls(TARGET_URL_PDF, current_urls, test_config)
 
     assert new_urls == expected_new
     mock_load.assert_called_once_with(test_config)
-    mock_save.assert_called_once_with(expected_saved_dict, test_config)
-
-@patch('src.storage.load_known_urls')
-@patch('src.storage.save_known_urls')
-def test_find_new_pdf_urls_current_is_subset(mock_save, mock_load, test_config):
-    """Test find_new_pdf_urls when current URLs are a subset."""
-    initial_dict = {TARGET_URL_PDF: ["http://a.pdf", "http://b.pdf", "http://c.pdf"]}
-    mock_load.return_value = initial_dict
-    current_urls = {"http://b.pdf", "http://a.pdf"}
-    target_url = TARGET_URL_PDF
-
-    new_urls = storage.find_new_pdf_urls(target_url, current_urls, test_config)
-
-    assert new_urls == set()
-    mock_load.assert_called_once_with(test_config)
-    mock_save.assert_not_called()
-
-@patch('src.storage.load_known_urls')
-@patch('src.storage.save_known_urls')
-def test_find_new_pdf_urls_empty_current(mock_save, mock_load, test_config):
-    """Test find_new_pdf_urls when the current URL set is empty."""
-    initial_dict = {TARGET_URL_PDF: ["http://a.pdf", "http://b.pdf"]}
-    mock_load.return_value = initial_dict
-    current_urls = set()
-    target_url = TARGET_URL_PDF
+    if expected_saved is None:
+        mock_save.assert_not_called()
+    else:
+        mock_save.assert_called_once_with(expected_saved, test_config, if_generation_match=SEED_GENERATION)
 
-    new_urls = storage.find_new_pdf_urls(target_url, current_urls, test_config)
-
-    assert new_urls == set()
-    mock_load.assert_called_once_with(test_config)
-    mock_save.assert_not_called()
-
-@patch('src.storage.load_known_urls')
-@patch('src.storage.save_known_urls')
-def test_find_new_pdf_urls_load_error(mock_save, mock_load, test_config, mocker):
+def test_find_new_pdf_urls_load_error(test_config, mocker, caplog):
     """Test find_new_pdf_urls handles critical load errors."""
-    mock_logger_error = mocker.patch('src.storage.logger.error')
+    mock_load = mocker.patch.object(storage, 'load_known_urls_with_generation')
+    mock_save = mocker.patch.object(storage, 'save_known_urls')
+    caplog.set_level(logging.ERROR, logger="src.storage")
     mock_load.side_effect = Exception("GCS Load Failed")
     current_urls = {"http://a.pdf"}
     target_url = TARGET_URL_PDF
 
     # Expect the exception to be raised
-    with pytest.raises(Exception, match="GCS Load Failed"):
+    with pytest.raises(Exception, match=RE_GCS_LOAD_FAILED):
         storage.find_new_pdf_urls(target_url, current_urls, test_config)
 
     mock_load.assert_called_once_with(test_config)
     mock_save.assert_not_called()
-    mock_logger_error.assert_called()
+    assert _error_messages(caplog)
 
-@patch('src.storage.load_known_urls')
-@patch('src.storage.save_known_urls')
-def test_find_new_pdf_urls_save_error(mock_save, mock_load, test_config, mocker):
+def test_find_new_pdf_urls_save_error(test_config, mocker, caplog):
     """Test find_new_pdf_urls handles save errors but still returns new URLs."""
-    mock_logger_error = mocker.patch('src.storage.logger.error')
+    mock_load = mocker.patch.object(storage, 'load_known_urls_with_generation')
+    mock_save = mocker.patch.object(storage, 'save_known_urls')
+    caplog.set_level(logging.ERROR, logger="src.storage")
     initial_dict = {TARGET_URL_PDF: ["http://a.pdf"]}
-    mock_load.return_value = initial_dict
+    mock_load.return_value = (initial_dict, None) # Local file: no generation guard
     current_urls = {"http://a.pdf", "http://b.pdf"}
     target_url = TARGET_URL_PDF
     expected_new = {"http://b.pdf"}
@@ -368,157 +429,227 @@ def test_find_new_pdf_urls_save_error(mock_save, mock_load, test_config, mocker)
 
     assert new_urls == expected_new
     mock_load.assert_called_once_with(test_config)
-    mock_save.assert_called_once_with(expected_saved_dict, test_config)
-    assert mock_logger_error.call_count >= 1
+    mock_save.assert_called_once_with(expected_saved_dict, test_config, if_generation_match=None)
+    assert _error_messages(caplog)
 
 
-# --- Test Cases for load_latest_meeting_ids ---
+@pytest.mark.parametrize("seeded_known_urls", [SEED_AB], indirect=True)
+def test_known_urls_session_batches_targets(seeded_known_urls, test_config):
+    """Test a session loads once and saves once across several target URLs."""
+    mock_save, mock_load = seeded_known_urls
 
-def test_load_latest_meeting_ids_gcs_not_found(mock_gcs_client, test_config):
-    """Test load_latest_meeting_ids when the GCS object does not exist."""
+    with storage.KnownUrlsSession(test_config) as session:
+        new_a = session.find_new_pdf_urls(TARGET_URL_PDF, {"http://a.pdf", "http://c.pdf"})
+        new_b = session.find_new_pdf_urls("http://other.url", {"http://x.pdf"}) # First run for this target
+        mock_save.assert_not_called() # Nothing written until the session ends
+
+    assert new_a == {"http://c.pdf"}
+    assert new_b == set()
+    mock_load.assert_called_once_with(test_config)
+    mock_save.assert_called_once_with(
+        {TARGET_URL_PDF: ["http://a.pdf", "http://b.pdf", "http://c.pdf"], "http://other.url": ["http://x.pdf"]},
+        test_config,
+        if_generation_match=SEED_GENERATION,
+    )
+
+@pytest.mark.parametrize("seeded_known_urls", [SEED_AB], indirect=True)
+def test_known_urls_session_without_changes_does_not_save(seeded_known_urls, test_config):
+    """Test a session that never changes the dict skips the save (and never loads if unused)."""
+    mock_save, mock_load = seeded_known_urls
+
+    with storage.KnownUrlsSession(test_config):
+        pass
+    mock_load.assert_not_called()
+
+    with storage.KnownUrlsSession(test_config) as session:
+        assert session.find_new_pdf_urls(TARGET_URL_PDF, {"http://a.pdf"}) == set()
+        assert session.find_new_pdf_urls(TARGET_URL_PDF, {"http://b.pdf"}) == set()
+
+    mock_load.assert_called_once_with(test_config)
+    mock_save.assert_not_called()
+
+def _serve_downloads(mock_blob, *versions):
+    """Makes successive download_as_bytes calls return each (payload, generation) in turn, updating blob.generation."""
+    pending = list(versions)
+
+    def download():
+        payload, mock_blob.generation = pending.pop(0)
+        return payload
+    mock_blob.download_as_bytes.side_effect = download
+
+def _upload_generations(mock_blob):
+    """The if_generation_match of each upload_from_string call, in order."""
+    return [c.kwargs['if_generation_match'] for c in mock_blob.upload_from_string.call_args_list]
+
+def test_known_urls_session_saves_with_loaded_generation(mock_gcs_client, test_config):
+    """Test the session's save is guarded by the GCS generation it loaded."""
     mock_client, mock_bucket, mock_blob = mock_gcs_client
-    mock_blob.download_as_string.side_effect = NotFound("Object not found")
+    _serve_downloads(mock_blob, (b'{"http://pdf.example.com": ["http://a.pdf"]}', 7))
 
-    latest_ids_dict = storage.load_latest_meeting_ids(test_config)
+    with storage.KnownUrlsSession(test_config) as session:
+        new_urls = session.find_new_pdf_urls(TARGET_URL_PDF, {"http://a.pdf", "http://b.pdf"})
 
-    assert latest_ids_dict == {}
-    mock_client.bucket.assert_called_once_with(TEST_BUCKET_NAME)
-    mock_bucket.blob.assert_called_once_with(TEST_LATEST_IDS_FILE) # Check correct filename
-    mock_blob.download_as_string.assert_called_once()
+    assert new_urls == {"http://b.pdf"}
+    assert _uploaded(mock_blob) == (
+        {TARGET_URL_PDF: ["http://a.pdf", "http://b.pdf"]},
+        {'content_type': 'application/json', 'if_generation_match': 7},
+    )
 
-def test_load_latest_meeting_ids_success(mock_gcs_client, test_config):
-    """Test load_latest_meeting_ids with a valid JSON dictionary."""
+def test_known_urls_session_first_run_creates_only_if_absent(mock_gcs_client, test_config):
+    """Test a missing object is created with if_generation_match=0 and nothing is reported as new."""
     mock_client, mock_bucket, mock_blob = mock_gcs_client
-    ids_dict = {TARGET_URL_MEETING: "ID_123", "http://other.meeting": "ID_456"}
-    mock_blob.download_as_string.return_value = json.dumps(ids_dict).encode('utf-8')
-    mock_blob.download_as_string.side_effect = None
+    mock_blob.download_as_bytes.side_effect = GCS_NOT_FOUND
 
-    latest_ids_dict = storage.load_latest_meeting_ids(test_config)
+    with storage.KnownUrlsSession(test_config) as session:
+        assert session.find_new_pdf_urls(TARGET_URL_PDF, {"http://a.pdf"}) == set()
 
-    assert latest_ids_dict == ids_dict
-    mock_blob.download_as_string.assert_called_once()
+    assert _upload_generations(mock_blob) == [0]
 
-def test_load_latest_meeting_ids_empty_json_dict(mock_gcs_client, test_config):
-    """Test load_latest_meeting_ids with an empty JSON dictionary."""
+def test_known_urls_session_concurrent_update(mock_gcs_client, test_config, mocker):
+    """Test a concurrent write (PreconditionFailed) triggers a re-read and the session's merges on top of it."""
     mock_client, mock_bucket, mock_blob = mock_gcs_client
-    mock_blob.download_as_string.return_value = json.dumps({}).encode('utf-8')
-    mock_blob.download_as_string.side_effect = None
+    mocker.patch.object(storage.logger, 'warning')
+    _serve_downloads(
+        mock_blob,
+        (b'{"http://pdf.example.com": ["http://a.pdf"]}', 7),
+        (b'{"http://pdf.example.com": ["http://a.pdf", "http://z.pdf"], "http://other.url": ["http://x.pdf"]}', 8),
+    )
+    mock_blob.upload_from_string.side_effect = [PreconditionFailed("generation mismatch"), None]
+
+    with storage.KnownUrlsSession(test_config) as session:
+        new_pdf = session.find_new_pdf_urls(TARGET_URL_PDF, {"http://a.pdf", "http://b.pdf"})
+        new_first = session.find_new_pdf_urls("http://first.url", {"http://f.pdf"}) # First run for this target
+
+    assert (new_pdf, new_first) == ({"http://b.pdf"}, set())
+    assert mock_blob.download_as_bytes.call_count == 2
+    assert _upload_generations(mock_blob) == [7, 8]
+    assert json.loads(gzip.decompress(mock_blob.upload_from_string.call_args.args[0])) == {
+        TARGET_URL_PDF: ["http://a.pdf", "http://b.pdf", "http://z.pdf"],
+        "http://other.url": ["http://x.pdf"],
+        "http://first.url": ["http://f.pdf"],
+    }
 
-    latest_ids_dict = storage.load_latest_meeting_ids(test_config)
+def test_known_urls_session_concurrent_update_already_applied(mock_gcs_client, test_config, mocker):
+    """Test no retry upload is made when the concurrent write already holds every update of the session."""
+    mock_client, mock_bucket, mock_blob = mock_gcs_client
+    mocker.patch.object(storage.logger, 'warning')
+    _serve_downloads(
+        mock_blob,
+        (b'{"http://pdf.example.com": ["http://a.pdf"]}', 7),
+        (b'{"http://pdf.example.com": ["http://a.pdf", "http://b.pdf"]}', 8),
+    )
+    mock_blob.upload_from_string.side_effect = PreconditionFailed("generation mismatch")
 
-    assert latest_ids_dict == {}
-    mock_blob.download_as_string.assert_called_once()
+    with storage.KnownUrlsSession(test_config) as session:
+        session.find_new_pdf_urls(TARGET_URL_PDF, {"http://a.pdf", "http://b.pdf"})
 
-def test_load_latest_meeting_ids_invalid_json(mock_gcs_client, test_config, mocker):
-    """Test load_latest_meeting_ids with invalid JSON (returns empty dict, logs error)."""
+    assert _upload_generations(mock_blob) == [7]
+
+def test_known_urls_session_gives_up_after_max_attempts(mock_gcs_client, test_config, mocker, caplog):
+    """Test repeated precondition failures stop after max_attempts and still return the new URLs."""
     mock_client, mock_bucket, mock_blob = mock_gcs_client
-    mock_logger_error = mocker.patch('src.storage.logger.error')
-    mock_blob.download_as_string.return_value = b"invalid json}"
-    mock_blob.download_as_string.side_effect = None
+    mocker.patch.object(storage.logger, 'warning')
+    caplog.set_level(logging.ERROR, logger="src.storage")
+    _serve_downloads(mock_blob, *[(b'{"http://pdf.example.com": []}', gen) for gen in (1, 2)])
+    mock_blob.upload_from_string.side_effect = PreconditionFailed("generation mismatch")
+
+    with storage.KnownUrlsSession(test_config, max_attempts=2) as session:
+        new_urls = session.find_new_pdf_urls(TARGET_URL_PDF, {"http://a.pdf"})
+
+    assert new_urls == {"http://a.pdf"}
+    assert _upload_generations(mock_blob) == [1, 2]
+    assert len(_error_messages(caplog)) == 1
+
+
+# --- Test Cases for load_latest_meeting_ids ---
+
+def test_load_latest_meeting_ids_gcs_not_found(mock_gcs_client, test_config):
+    """Test load_latest_meeting_ids when the GCS object does not exist."""
+    mock_client, mock_bucket, mock_blob = mock_gcs_client
+    mock_blob.download_as_bytes.side_effect = GCS_NOT_FOUND
 
     latest_ids_dict = storage.load_latest_meeting_ids(test_config)
 
     assert latest_ids_dict == {}
-    mock_blob.download_as_string.assert_called_once()
-    mock_logger_error.assert_called_once()
+    mock_client.bucket.assert_called_once_with(TEST_BUCKET_NAME)
+    mock_bucket.blob.assert_called_once_with(TEST_LATEST_IDS_FILE) # Check correct filename
+    mock_blob.download_as_bytes.assert_called_once()
 
-def test_load_latest_meeting_ids_not_a_dict(mock_gcs_client, test_config, mocker):
-    """Test load_latest_meeting_ids when content is not a dict (returns empty dict, logs error)."""
+def test_load_latest_meeting_ids_success(mock_gcs_client, test_config):
+    """Test load_latest_meeting_ids with a valid JSON dictionary."""
     mock_client, mock_bucket, mock_blob = mock_gcs_client
-    mock_logger_error = mocker.patch('src.storage.logger.error')
-    mock_blob.download_as_string.return_value = json.dumps(["id1", "id2"]).encode('utf-8')
-    mock_blob.download_as_string.side_effect = None
+    mock_blob.download_as_bytes.return_value = b'{"http://meeting.example.com": "ID_123", "http://other.meeting": "ID_456"}'
+    mock_blob.download_as_bytes.side_effect = None
 
     latest_ids_dict = storage.load_latest_meeting_ids(test_config)
 
-    assert latest_ids_dict == {}
-    mock_blob.download_as_string.assert_called_once()
-    mock_logger_error.assert_called_once()
+    assert latest_ids_dict == {TARGET_URL_MEETING: "ID_123", "http://other.meeting": "ID_456"}
+    mock_blob.download_as_bytes.assert_called_once()
 
-def test_load_latest_meeting_ids_invalid_structure(mock_gcs_client, test_config, mocker):
-    """Test load_latest_meeting_ids with incorrect dict structure (returns empty dict, logs error)."""
+def test_load_latest_meeting_ids_empty_json_dict(mock_gcs_client, test_config):
+    """Test load_latest_meeting_ids with an empty JSON dictionary."""
     mock_client, mock_bucket, mock_blob = mock_gcs_client
-    mock_logger_error = mocker.patch('src.storage.logger.error')
-    invalid_dict = {TARGET_URL_MEETING: ["not_a_string"]} # Value should be string
-    mock_blob.download_as_string.return_value = json.dumps(invalid_dict).encode('utf-8')
-    mock_blob.download_as_string.side_effect = None
+    mock_blob.download_as_bytes.return_value = b'{}'
+    mock_blob.download_as_bytes.side_effect = None
 
     latest_ids_dict = storage.load_latest_meeting_ids(test_config)
 
     assert latest_ids_dict == {}
-    mock_blob.download_as_string.assert_called_once()
-    mock_logger_error.assert_called()
+    mock_blob.download_as_bytes.assert_called_once()
 
-def test_load_latest_meeting_ids_gcs_download_error(mock_gcs_client, test_config, mocker):
+def test_load_latest_meeting_ids_gcs_download_error(mock_gcs_client, test_config, caplog):
     """Test load_latest_meeting_ids handles GCS download errors (logs exception, returns empty dict)."""
     mock_client, mock_bucket, mock_blob = mock_gcs_client
-    mock_logger_exception = mocker.patch('src.storage.logger.exception')
-    mock_blob.download_as_string.side_effect = Exception("GCS API error")
+    caplog.set_level(logging.ERROR, logger="src.storage")
+    mock_blob.download_as_bytes.side_effect = Exception("GCS API error")
 
     # Should raise the exception
-    with pytest.raises(Exception, match="GCS API error"):
+    with pytest.raises(Exception, match=RE_GCS_API_ERROR):
         storage.load_latest_meeting_ids(test_config)
 
-    mock_blob.download_as_string.assert_called_once()
-    mock_logger_exception.assert_called_once()
+    mock_blob.download_as_bytes.assert_called_once()
+    assert len(_error_messages(caplog)) == 1
 
-def test_load_latest_meeting_ids_missing_config(mock_app_config): # Use the correct fixture name
+def test_load_latest_meeting_ids_missing_config(mock_app_config, fake_local_fs): # Use the correct fixture name
     """Test load_latest_meeting_ids returns empty dict if config is missing GCS bucket."""
-    # Create a new config instance with gcs_bucket_name=None
-    config_no_gcs = Config(
-        target_urls=mock_app_config.target_urls,
-        url_configs=mock_app_config.url_configs,
-        slack_api_token=mock_app_config.slack_api_token,
-        slack_channel_id=mock_app_config.slack_channel_id,
-        known_urls_file=mock_app_config.known_urls_file,
-        latest_ids_file=mock_app_config.latest_ids_file,
-        log_level=mock_app_config.log_level,
-        admin_slack_channel_id=mock_app_config.admin_slack_channel_id,
-        gcs_bucket_name=None # Set to None for this test
-    )
+    config_no_gcs = dataclasses.replace(mock_app_config, gcs_bucket_name=None)
     latest_ids_dict = storage.load_latest_meeting_ids(config_no_gcs) # Pass the modified config
     assert latest_ids_dict == {}
 
+def test_latest_meeting_ids_local_file_round_trip(test_config, fake_local_fs):
+    """Test save/load_latest_meeting_ids round-trip through the local-file branch (in memory)."""
+    local_config = dataclasses.replace(test_config, gcs_bucket_name=None)
+
+    storage.save_latest_meeting_ids({TARGET_URL_MEETING: "ID_1"}, local_config)
+
+    assert json.loads(fake_local_fs[TEST_LATEST_IDS_FILE]) == {TARGET_URL_MEETING: "ID_1"}
+    assert storage.load_latest_meeting_ids(local_config) == {TARGET_URL_MEETING: "ID_1"}
+
 
 # --- Test Cases for save_latest_meeting_ids ---
 
 def test_save_latest_meeting_ids_success(mock_gcs_client, test_config):
     """Test save_latest_meeting_ids successfully saves a dictionary to GCS."""
     mock_client, mock_bucket, mock_blob = mock_gcs_client
-    ids_dict_to_save: Dict[str, str] = {
-        TARGET_URL_MEETING: "ID_789",
-        "http://other.meeting": "ID_101"
-    }
-    # Expected JSON should be sorted by key
-    expected_dict_sorted = dict(sorted(ids_dict_to_save.items()))
-    expected_json_string = json.dumps(expected_dict_sorted, ensure_ascii=False, indent=2)
 
-    storage.save_latest_meeting_ids(ids_dict_to_save, test_config)
+    storage.save_latest_meeting_ids(MEETING_IDS_TO_SAVE, test_config)
 
     mock_client.bucket.assert_called_once_with(TEST_BUCKET_NAME)
     mock_bucket.blob.assert_called_once_with(TEST_LATEST_IDS_FILE) # Check correct filename
-    mock_blob.upload_from_string.assert_called_once_with(
-        expected_json_string,
-        content_type='application/json'
-    )
+    assert _uploaded(mock_blob) == (MEETING_IDS_TO_SAVE, {'content_type': 'application/json'})
 
 def test_save_latest_meeting_ids_empty_dict(mock_gcs_client, test_config):
     """Test save_latest_meeting_ids with an empty dictionary."""
     mock_client, mock_bucket, mock_blob = mock_gcs_client
-    ids_dict_to_save: Dict[str, str] = {}
-    expected_json_string = json.dumps({}, ensure_ascii=False, indent=2)
 
-    storage.save_latest_meeting_ids(ids_dict_to_save, test_config)
+    storage.save_latest_meeting_ids({}, test_config)
 
-    mock_blob.upload_from_string.assert_called_once_with(
-        expected_json_string,
-        content_type='application/json'
-    )
+    assert _uploaded(mock_blob) == ({}, {'content_type': 'application/json'})
 
-def test_save_latest_meeting_ids_gcs_upload_error(mock_gcs_client, test_config, mocker):
+def test_save_latest_meeting_ids_gcs_upload_error(mock_gcs_client, test_config, caplog):
     """Test save_latest_meeting_ids handles GCS upload errors (logs but doesn't raise)."""
     mock_client, mock_bucket, mock_blob = mock_gcs_client
-    mock_logger_exception = mocker.patch('src.storage.logger.exception')
+    caplog.set_level(logging.ERROR, logger="src.storage")
     ids_dict_to_save = {TARGET_URL_MEETING: "ID_Error"}
     mock_blob.upload_from_string.side_effect = Exception("GCS upload failed")
 
@@ -526,23 +657,12 @@ def test_save_latest_meeting_ids_gcs_upload_error(mock_gcs_client, test_config,
     storage.save_latest_meeting_ids(ids_dict_to_save, test_config)
 
     mock_blob.upload_from_string.assert_called_once()
-    mock_logger_exception.assert_called_once()
+    assert len(_error_messages(caplog)) == 1
 
-def test_save_latest_meeting_ids_missing_config(mock_app_config, mocker): # Use the correct fixture name
+def test_save_latest_meeting_ids_missing_config(mock_app_config, caplog): # Use the correct fixture name
     """Test save_latest_meeting_ids logs error if config is missing GCS bucket."""
-    mock_logger_error = mocker.patch('src.storage.logger.error')
-    # Create a new config instance with gcs_bucket_name=None
-    config_no_gcs = Config(
-        target_urls=mock_app_config.target_urls,
-        url_configs=mock_app_config.url_configs,
-        slack_api_token=mock_app_config.slack_api_token,
-        slack_channel_id=mock_app_config.slack_channel_id,
-        known_urls_file=mock_app_config.known_urls_file,
-        latest_ids_file=None, # Set storage path to None as well
-        log_level=mock_app_config.log_level,
-        admin_slack_channel_id=mock_app_config.admin_slack_channel_id,
-        gcs_bucket_name=None # Set to None for this test
-    )
+    caplog.set_level(logging.ERROR, logger="src.storage")
+    config_no_gcs = dataclasses.replace(mock_app_config, gcs_bucket_name=None, latest_ids_file=None) # Storage path missing as well
     # Similar to save_known_urls, if GCS bucket is None, it should log error
     storage.save_latest_meeting_ids({}, config_no_gcs) # Pass the modified config
-    mock_logger_error.assert_called_with("Storage configuration invalid or missing. Cannot save latest meeting IDs. Provide GCS bucket name or ensure local path is set without GCS bucket.")
+    assert _error_messages(caplog)[-1] == "Storage configuration invalid or missing. Cannot save latest meeting IDs. Provide GCS bucket name or ensure local path is set without GCS bucket."